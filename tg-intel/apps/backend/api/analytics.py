@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Literal, Optional, List
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+
+from apps.backend.core.db import fetch_all, fetch_val
+
+
+router = APIRouter()
+
+# Granularity -> rollup table and the default look-back when since is omitted
+_ROLLUPS = {
+    "hour": ("channel_stats_hourly", timedelta(hours=48)),
+    "day": ("channel_stats_daily", timedelta(days=30)),
+}
+
+
+class ActivityPoint(BaseModel):
+    bucket: str
+    posts: int
+    views: int
+    forwards: int
+    replies: int
+    reactions: int
+
+
+class ActivitySeries(BaseModel):
+    granularity: Literal["hour", "day"]
+    since: str
+    until: str
+    points: List[ActivityPoint]
+
+
+def _utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+async def _series(
+    granularity: str,
+    channel_ids: Optional[List[int]],
+    since: Optional[datetime],
+    until: Optional[datetime],
+) -> dict:
+    table, lookback = _ROLLUPS[granularity]
+    until = _utc(until) if until else datetime.now(timezone.utc)
+    since = _utc(since) if since else until - lookback
+    channel_filter = "channel_id = any(%s) and" if channel_ids else ""
+    params: list[Any] = [channel_ids] if channel_ids else []
+    # Reads pre-aggregated buckets only; never scans posts
+    rows = await fetch_all(
+        f"""
+        select bucket, sum(posts)::bigint as posts, sum(views)::bigint as views, sum(forwards)::bigint as forwards,
+               sum(replies)::bigint as replies, sum(reactions)::bigint as reactions
+        from {table}
+        where {channel_filter} bucket >= date_trunc(%s, %s::timestamptz, 'UTC') and bucket < %s
+        group by bucket
+        order by bucket
+        """,
+        *params,
+        granularity,
+        since,
+        until,
+    )
+    points = [{**r, "bucket": r["bucket"].isoformat()} for r in rows]
+    return {"granularity": granularity, "since": since.isoformat(), "until": until.isoformat(), "points": points}
+
+
+@router.get("/analytics/channels/{channel_id}/activity", response_model=ActivitySeries)
+async def channel_activity(
+    channel_id: int,
+    granularity: Literal["hour", "day"] = Query(default="day"),
+    since: Optional[datetime] = Query(default=None),
+    until: Optional[datetime] = Query(default=None),
+) -> Any:
+    if await fetch_val("select 1 from channels where id=%s", channel_id) is None:
+        raise HTTPException(status_code=404, detail="Channel not found")
+    return await _series(granularity, [channel_id], since, until)
+
+
+@router.get("/analytics/activity", response_model=ActivitySeries)
+async def overall_activity(
+    granularity: Literal["hour", "day"] = Query(default="day"),
+    channel_id: Optional[List[int]] = Query(default=None, description="Sum over these channels; all when omitted"),
+    since: Optional[datetime] = Query(default=None),
+    until: Optional[datetime] = Query(default=None),
+) -> Any:
+    return await _series(granularity, channel_id, since, until)
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, AsyncIterator, Literal, Optional, List
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from apps.backend.core.db import require_pool
+from apps.backend.services.archive import archived_months, read_archived_posts
+from apps.backend.services.export import EXPORT_FORMATS, encode_batches, parquet_available
+
+
+router = APIRouter()
+
+
+class ArchivedMonth(BaseModel):
+    month: str
+    file_name: str
+    rows: int
+    bytes: int
+    channel_ids: List[int]
+    archived_at: str
+
+
+@router.get("/archive", response_model=List[ArchivedMonth])
+async def list_archived_months(
+    channel_id: Optional[List[int]] = Query(default=None, description="Only months holding posts of these channels"),
+    since: Optional[datetime] = Query(default=None),
+    until: Optional[datetime] = Query(default=None),
+) -> Any:
+    pool = require_pool()
+    async with pool.connection() as conn:
+        rows = await archived_months(conn, channel_id, since, until)
+    for r in rows:
+        r["month"] = r["month"].isoformat()
+        r["archived_at"] = r["archived_at"].isoformat()
+    return rows
+
+
+@router.get("/archive/posts")
+async def query_archived_posts(
+    format: Literal["ndjson", "csv", "parquet"] = Query(default="ndjson"),
+    channel_id: Optional[List[int]] = Query(default=None, description="Restrict to these channels; repeat for several"),
+    since: Optional[datetime] = Query(default=None),
+    until: Optional[datetime] = Query(default=None),
+    query: Optional[str] = Query(default=None, description="Case-insensitive substring of the post text"),
+) -> StreamingResponse:
+    """Stream archived posts in the export formats, reading only the months that overlap the range."""
+    if not parquet_available():
+        raise HTTPException(status_code=501, detail="Reading the archive requires pyarrow")
+    pool = require_pool()
+
+    async def body() -> AsyncIterator[bytes]:
+        async with pool.connection() as conn:
+            async for chunk in encode_batches(format, read_archived_posts(conn, channel_id, since, until, query)):
+                yield chunk
+
+    media_type, ext = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="archived_posts.{ext}"'},
+    )
@@ -1,14 +1,18 @@
 from __future__ import annotations
 
+from datetime import datetime, timezone
 from typing import Any, Optional, List
 import re
 from urllib.parse import urlparse
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
 from pydantic import BaseModel, HttpUrl
 
+from apps.backend.core.cache import cached_json, channel_tag, response_cache
 from apps.backend.core.db import require_pool
 from apps.backend.services.telegram import resolve_channel
+from apps.backend.services.fetcher import enqueue_fetch_job
+from apps.backend.services.digest import channel_digest
 from apps.backend.core.logger import logger
 
 
@@ -81,24 +85,25 @@ async def create_channel(payload: ChannelCreate) -> Any:
                 raise HTTPException(status_code=500, detail="Failed to create channel")
 
             # Enqueue initial fetch job
-            async with conn.cursor() as cur:
-                await cur.execute(
-                    "insert into fetch_jobs (channel_id, status) values (%s, 'queued') returning id",
-                    (row[0],),
-                )
-                await cur.fetchone()
+            await enqueue_fetch_job(conn, row[0])
 
-            return {
-                "id": row[0],
-                "tg_url": row[1],
-                "title": row[2],
-                "status": row[3],
-                "created_at": row[4].isoformat() if hasattr(row[4], 'isoformat') else str(row[4]),
-            }
+    # Invalidate only after the insert has committed
+    response_cache.invalidate("channels")
+    return {
+        "id": row[0],
+        "tg_url": row[1],
+        "title": row[2],
+        "status": row[3],
+        "created_at": row[4].isoformat() if hasattr(row[4], 'isoformat') else str(row[4]),
+    }
 
 
 @router.get("", response_model=List[ChannelOut])
-async def list_channels() -> Any:
+async def list_channels(request: Request) -> Response:
+    return await cached_json(request, ("channels",), ("channels",), List[ChannelOut], _list_channels)
+
+
+async def _list_channels() -> list[dict]:
     pool = require_pool()
     async with pool.connection() as conn:
         async with conn.cursor() as cur:
@@ -125,6 +130,7 @@ async def delete_channel(channel_id: int):
         async with conn.cursor() as cur:
             await cur.execute("delete from channels where id=%s", (channel_id,))
             # 204 even if not found, to make UI idempotent
+    response_cache.invalidate("channels", channel_tag(channel_id))
 
 
 class FetchResult(BaseModel):
@@ -157,24 +163,20 @@ async def force_fetch(channel_id: int) -> Any:
                 resolved_info = await resolve_channel(tg_url)
                 async with conn.cursor() as cur:
                     await cur.execute(
-                        "update channels set tg_id=%s, title=coalesce(title,%s), status='active' where id=%s",
-                        (resolved_info.tg_id, resolved_info.title, ch_id),
+                        "update channels set tg_id=%s, tg_access_hash=%s, tg_access_hash_account=%s, title=coalesce(title,%s), status='active' where id=%s",
+                        (resolved_info.tg_id, resolved_info.access_hash, resolved_info.account, resolved_info.title, ch_id),
                     )
                 resolved = True
+                response_cache.invalidate("channels", channel_tag(ch_id))
             except Exception as e:  # noqa: BLE001
                 # Keep status pending; still enqueue job to retry later
                 logger.exception("Failed to resolve channel", extra={"channel_id": ch_id, "tg_url": tg_url})
                 resolved = False
 
-        # Enqueue job
-        async with conn.cursor() as cur:
-            await cur.execute(
-                "insert into fetch_jobs (channel_id, status) values (%s, 'queued') returning id",
-                (ch_id,),
-            )
-            await cur.fetchone()
+        # Enqueue job unless one is already queued or running
+        enqueued = await enqueue_fetch_job(conn, ch_id)
 
-    return {"enqueued": True, "resolved": resolved, "channel_id": channel_id}
+    return {"enqueued": enqueued, "resolved": resolved, "channel_id": channel_id}
 
 
 class JobOut(BaseModel):
@@ -208,3 +210,28 @@ async def latest_job(channel_id: int) -> Any:
             }
 
 
+class DigestOut(BaseModel):
+    channel_id: int
+    window_start: str
+    digest: str
+    post_count: int
+    new_posts: int
+    cached: bool
+    updated_at: Optional[str] = None
+
+
+@router.get("/{channel_id}/digest", response_model=DigestOut)
+async def get_channel_digest(
+    channel_id: int,
+    since: Optional[datetime] = Query(default=None, description="Window start (ISO 8601, UTC if no offset); defaults to today 00:00 UTC"),
+    model: Optional[str] = None,
+) -> Any:
+    pool = require_pool()
+    async with pool.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("select 1 from channels where id=%s", (channel_id,))
+            if await cur.fetchone() is None:
+                raise HTTPException(status_code=404, detail="Channel not found")
+    if since is None:
+        since = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    return await channel_digest(channel_id, since, model_id=model)
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import AsyncIterator, Literal, Optional, List
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from apps.backend.core.db import require_pool
+from apps.backend.services.export import EXPORT_FORMATS, parquet_available, stream_export
+
+
+router = APIRouter()
+
+
+@router.get("/export")
+async def export_posts(
+    format: Literal["ndjson", "csv", "parquet"] = Query(default="ndjson"),
+    channel_id: Optional[List[int]] = Query(default=None, description="Restrict to these channels; repeat for several"),
+    since: Optional[datetime] = Query(default=None),
+    until: Optional[datetime] = Query(default=None),
+    query: Optional[str] = Query(default=None),
+) -> StreamingResponse:
+    """Stream every matching post in one response (chunked), read through a server-side cursor."""
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+    pool = require_pool()
+
+    async def body() -> AsyncIterator[bytes]:
+        async with pool.connection() as conn:
+            async for chunk in stream_export(conn, format, channel_id, since, until, query):
+                yield chunk
+
+    media_type, ext = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="posts.{ext}"'},
+    )
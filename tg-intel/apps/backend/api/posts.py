@@ -1,15 +1,30 @@
 from __future__ import annotations
 
-from typing import Any, Optional, List
+from datetime import datetime
+from typing import Any, Literal, Optional, List
+import base64
+import json
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from pydantic import BaseModel
 
+from apps.backend.core.cache import cached_json, channel_tag
 from apps.backend.core.db import fetch_all, fetch_val
 
 
 router = APIRouter()
 
+# Sort key -> posts column; each is backed by a (channel_id, <column> desc nulls last, id desc) index
+_SORT_COLUMN = {
+    "date": "posted_at",
+    "views": "views",
+    "forwards": "forwards",
+    "replies": "replies",
+    "reactions": "reactions",
+}
+
+_POST_COLUMNS = ("id", "channel_id", "tg_message_id", "posted_at", "text", "views", "forwards", "replies", "reactions")
+
 
 class PostOut(BaseModel):
     id: int
@@ -27,64 +42,180 @@ class PostsPage(BaseModel):
     items: List[PostOut]
     page: int
     page_size: int
-    total: int
+    # Exact for unfiltered listings (maintained per channel); null for searches unless include_total=true
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(sort_value: Any, post_id: int) -> str:
+    """Opaque keyset cursor: position after (sort_value, post_id) in ``desc nulls last`` order."""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, post_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple[Any, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, post_id = json.loads(raw)
+        if sort_value is not None:
+            sort_value = datetime.fromisoformat(sort_value) if sort == "date" else int(sort_value)
+        return sort_value, int(post_id)
+    except Exception:  # noqa: BLE001
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _keyset_branches(
+    col: str,
+    after: Optional[tuple[Any, int]],
+    where: str,
+    where_params: list[Any],
+    page_size: int,
+) -> tuple[str, list[Any]]:
+    """Split ``order by col desc nulls last, id desc`` into non-null and null segments.
+
+    Each segment is an ordered index range scan limited to one page; the outer
+    query sorts at most two pages of rows by (segment, col, id).
+    """
+    sel = ", ".join(f"p.{c}" for c in _POST_COLUMNS)
+    branches: list[str] = []
+    params: list[Any] = []
+    if after is None or after[0] is not None:
+        cond = f"p.{col} is not null"
+        branch_params = list(where_params)
+        if after is not None:
+            cond += f" and (p.{col}, p.id) < (%s, %s)"
+            branch_params += [after[0], after[1]]
+        branches.append(
+            f"(select {sel}, 0 as seg from posts p where p.channel_id=c.id and {where} and {cond} "
+            f"order by p.{col} desc, p.id desc limit %s)"
+        )
+        params += branch_params + [page_size]
+    cond = f"p.{col} is null"
+    branch_params = list(where_params)
+    if after is not None and after[0] is None:
+        cond += " and p.id < %s"
+        branch_params.append(after[1])
+    branches.append(
+        f"(select {sel}, 1 as seg from posts p where p.channel_id=c.id and {where} and {cond} "
+        f"order by p.id desc limit %s)"
+    )
+    params += branch_params + [page_size]
+    return " union all ".join(branches), params
 
 
 @router.get("/channels/{channel_id}/posts", response_model=PostsPage)
 async def list_posts(
+    request: Request,
     channel_id: int,
     query: Optional[str] = Query(default=None),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=100),
-) -> Any:
-    offset = (page - 1) * page_size
-    # Validate channel exists
-    ch = await fetch_val("select 1 from channels where id=%s", channel_id)
-    if not ch:
-        raise HTTPException(status_code=404, detail="Channel not found")
+    sort: Literal["date", "views", "forwards", "replies", "reactions"] = Query(default="date"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page; takes precedence over page"),
+    include_total: bool = Query(default=False, description="Exact match count for searches (costs an extra query)"),
+) -> Response:
+    key = ("posts", channel_id, query, page, page_size, sort, cursor, include_total)
+    return await cached_json(
+        request,
+        key,
+        (channel_tag(channel_id),),
+        PostsPage,
+        lambda: _list_posts(channel_id, query, page, page_size, sort, cursor, include_total),
+    )
 
-    if query:
-        tsquery = query
-        sql_items = (
-            "select id, channel_id, tg_message_id, posted_at, text, "
-            "       nullif(raw->>'views','')::int as views, "
-            "       nullif(raw->>'forwards','')::int as forwards, "
-            "       nullif(raw->>'replies','')::int as replies, "
-            "       nullif(raw->>'reactions','')::int as reactions "
-            "from posts "
-            "where channel_id=%s and text_tsv @@ plainto_tsquery('simple', %s) "
-            "order by posted_at desc nulls last limit %s offset %s"
-        )
-        sql_count = (
-            "select count(*) from posts where channel_id=%s and text_tsv @@ plainto_tsquery('simple', %s)"
+
+async def _list_posts(
+    channel_id: int,
+    query: Optional[str],
+    page: int,
+    page_size: int,
+    sort: str,
+    cursor: Optional[str],
+    include_total: bool,
+) -> dict:
+    col = _SORT_COLUMN[sort]
+    where = "p.text_tsv @@ plainto_tsquery('simple', %s)" if query else "true"
+    where_params: list[Any] = [query] if query else []
+    after = decode_cursor(cursor, sort) if cursor else None
+
+    if after is None and page > 1:
+        # Legacy offset paging; prefer next_cursor, which stays flat on deep pages
+        sel = ", ".join(f"p.{c}" for c in _POST_COLUMNS)
+        inner = (
+            f"select {sel}, 0 as seg from posts p where p.channel_id=c.id and {where} "
+            f"order by p.{col} desc nulls last, p.id desc limit %s offset %s"
         )
-        rows = await fetch_all(sql_items, channel_id, tsquery, page_size, offset)
-        total = await fetch_val(sql_count, channel_id, tsquery)
+        inner_params: list[Any] = where_params + [page_size, (page - 1) * page_size]
+        order = f"p.{col} desc nulls last, p.id desc"
     else:
-        rows = await fetch_all(
-            "select id, channel_id, tg_message_id, posted_at, text, "
-            "       nullif(raw->>'views','')::int as views, "
-            "       nullif(raw->>'forwards','')::int as forwards, "
-            "       nullif(raw->>'replies','')::int as replies, "
-            "       nullif(raw->>'reactions','')::int as reactions "
-            "from posts where channel_id=%s order by posted_at desc nulls last limit %s offset %s",
-            channel_id,
-            page_size,
-            offset,
-        )
-        total = await fetch_val(
-            "select count(*) from posts where channel_id=%s",
+        inner, inner_params = _keyset_branches(col, after, where, where_params, page_size)
+        order = f"p.seg, p.{col} desc, p.id desc"
+
+    # One round trip: the channel row proves existence and carries the maintained total
+    rows = await fetch_all(
+        f"select c.post_count, p.* from channels c "
+        f"left join lateral (select * from ({inner}) b) p on true "
+        f"where c.id=%s order by {order} limit %s",
+        *inner_params,
+        channel_id,
+        page_size,
+    )
+    if not rows:
+        raise HTTPException(status_code=404, detail="Channel not found")
+
+    total: Optional[int] = int(rows[0]["post_count"]) if not query else None
+    if query and include_total:
+        total = int(await fetch_val(
+            "select count(*) from posts where channel_id=%s and text_tsv @@ plainto_tsquery('simple', %s)",
             channel_id,
-        )
+            query,
+        ))
 
     # Normalize posted_at to ISO string for response model compatibility
     items = []
     for r in rows:
-        item = dict(r)
+        if r["id"] is None:  # channel without matching posts
+            continue
+        item = {c: r[c] for c in _POST_COLUMNS}
         pa = item.get("posted_at")
         if pa is not None and hasattr(pa, "isoformat"):
             item["posted_at"] = pa.isoformat()
         items.append(item)
-    return {"items": items, "page": page, "page_size": page_size, "total": int(total)}
+    next_cursor = None
+    if len(items) == page_size:
+        last = rows[-1]
+        next_cursor = encode_cursor(last[col], last["id"])
+    return {"items": items, "page": page, "page_size": page_size, "total": total, "next_cursor": next_cursor}
 
 
+class MetricSnapshot(BaseModel):
+    captured_at: str
+    views: Optional[int] = None
+    forwards: Optional[int] = None
+    replies: Optional[int] = None
+    reactions: Optional[int] = None
+
+
+@router.get("/posts/{post_id}/metrics/history", response_model=List[MetricSnapshot])
+async def post_metrics_history(
+    post_id: int,
+    since: Optional[datetime] = Query(default=None),
+    until: Optional[datetime] = Query(default=None),
+) -> Any:
+    """Engagement counters of one post each time they changed, oldest first."""
+    if await fetch_val("select 1 from posts where id=%s", post_id) is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    rows = await fetch_all(
+        """
+        select captured_at, views, forwards, replies, reactions
+        from post_metric_snapshots
+        where post_id=%s and captured_at >= coalesce(%s::timestamptz, '-infinity') and captured_at < coalesce(%s::timestamptz, 'infinity')
+        order by captured_at
+        """,
+        post_id,
+        since,
+        until,
+    )
+    return [{**r, "captured_at": r["captured_at"].isoformat()} for r in rows]
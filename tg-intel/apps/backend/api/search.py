@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from typing import Any, Literal, Optional, List
+import base64
+import json
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+
+from apps.backend.api.posts import PostOut
+from apps.backend.core.db import fetch_all
+
+
+router = APIRouter()
+
+# Highlight options for ts_headline; <mark> tags are the only markup in a snippet
+_HEADLINE_OPTIONS = 'StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2, FragmentDelimiter=" … "'
+
+_EXCERPT_CHARS = 200
+
+
+def _escape_html(expr: str) -> str:
+    """SQL for ``expr`` with HTML special characters escaped."""
+    return f"replace(replace(replace(replace({expr}, '&', '&amp;'), '<', '&lt;'), '>', '&gt;'), '\"', '&quot;')"
+
+
+# Per mode: the match condition over posts p, its score (both real, so cursors round-trip exactly)
+# and the snippet. Post text comes from arbitrary channels, so snippets escape it before adding <mark>.
+_MODES = {
+    # Full-text match ranked by cover density, normalized by document length
+    "fts": (
+        "p.text_tsv @@ websearch_to_tsquery('simple', %s)",
+        "ts_rank_cd(p.text_tsv, websearch_to_tsquery('simple', %s), 1)",
+        "ts_headline('simple', " + _escape_html("coalesce(p.text, '')") + ", websearch_to_tsquery('simple', %s), %s)",
+    ),
+    # Typo-tolerant fallback: closest word-level trigram similarity (gin_trgm_ops index).
+    # No tsquery matches these rows, so the snippet is a plain leading excerpt
+    "trgm": (
+        "%s <%% p.text",
+        "word_similarity(%s, p.text)",
+        _escape_html(f"coalesce(left(p.text, {_EXCERPT_CHARS}), '')")
+        + f" || case when length(p.text) > {_EXCERPT_CHARS} then ' …' else '' end",
+    ),
+}
+
+
+class SearchHit(PostOut):
+    channel_title: Optional[str] = None
+    score: float
+    snippet: Optional[str] = None
+
+
+class SearchPage(BaseModel):
+    items: List[SearchHit]
+    mode: Literal["fts", "trgm"]
+    next_cursor: Optional[str] = None
+
+
+def _encode_cursor(mode: str, score: float, post_id: int) -> str:
+    raw = json.dumps([mode, score, post_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[str, float, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        mode, score, post_id = json.loads(raw)
+        if mode not in _MODES:
+            raise ValueError(mode)
+        return mode, float(score), int(post_id)
+    except Exception:  # noqa: BLE001
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def _search(
+    mode: str,
+    q: str,
+    channel_ids: Optional[List[int]],
+    after: Optional[tuple[float, int]],
+    limit: int,
+) -> list[dict]:
+    match, score, snippet = _MODES[mode]
+    filters = [match]
+    params: list[Any] = [q, q]
+    if channel_ids:
+        filters.append("p.channel_id = any(%s)")
+        params.append(channel_ids)
+    keyset = "true"
+    if after is not None:
+        keyset = "(m.score, m.id) < (%s::real, %s)"
+        params += [after[0], after[1]]
+    params.append(limit)
+    if mode == "fts":
+        params += [q, _HEADLINE_OPTIONS]
+    # Rank every match, keep one page, then build snippets for that page only.
+    # posted_at is carried along so the join back to posts prunes to one partition per row
+    return await fetch_all(
+        f"""
+        with m as (
+          select * from (
+            select p.id, p.posted_at, {score} as score
+            from posts p
+            where {' and '.join(filters)}
+          ) m
+          where {keyset}
+          order by m.score desc, m.id desc
+          limit %s
+        )
+        select p.id, p.channel_id, c.title as channel_title, p.tg_message_id, p.posted_at, p.text,
+               p.views, p.forwards, p.replies, p.reactions, m.score, {snippet} as snippet
+        from m
+        join posts p on p.id = m.id and p.posted_at = m.posted_at
+        join channels c on c.id = p.channel_id
+        order by m.score desc, m.id desc
+        """,
+        *params,
+    )
+
+
+@router.get("/search", response_model=SearchPage)
+async def search_posts(
+    q: str = Query(min_length=1),
+    channel_id: Optional[List[int]] = Query(default=None, description="Restrict to these channels; repeat for several"),
+    page_size: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = Query(default=None),
+) -> Any:
+    if cursor:
+        mode, score, post_id = _decode_cursor(cursor)
+        rows = await _search(mode, q, channel_id, (score, post_id), page_size)
+    else:
+        mode = "fts"
+        rows = await _search(mode, q, channel_id, None, page_size)
+        if not rows:
+            # Nothing matched the exact terms: retry as a typo-tolerant trigram search
+            mode = "trgm"
+            rows = await _search(mode, q, channel_id, None, page_size)
+
+    items = []
+    for r in rows:
+        item = dict(r)
+        pa = item.get("posted_at")
+        if pa is not None and hasattr(pa, "isoformat"):
+            item["posted_at"] = pa.isoformat()
+        items.append(item)
+    next_cursor = None
+    if len(rows) == page_size:
+        next_cursor = _encode_cursor(mode, rows[-1]["score"], rows[-1]["id"])
+    return {"items": items, "mode": mode, "next_cursor": next_cursor}
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Optional
+import json
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from apps.backend.core.db import require_pool
-from apps.backend.services.ai import summarize
+from apps.backend.core.db import fetch_one
+from apps.backend.core.logger import logger
+from apps.backend.services.summarizer import get_or_create_summary, needs_model_summary, stream_summary
 
 
 router = APIRouter()
@@ -20,30 +23,47 @@ class SummaryOut(BaseModel):
 
 @router.post("/posts/{post_id}/summarize", response_model=SummaryOut)
 async def summarize_post(post_id: int, model: Optional[str] = None) -> Any:
-    pool = require_pool()
-    async with pool.connection() as conn:
-        async with conn.cursor() as cur:
-            await cur.execute("select id, text from posts where id=%s", (post_id,))
-            post = await cur.fetchone()
-        if not post:
-            raise HTTPException(status_code=404, detail="Post not found")
-
-        async with conn.cursor() as cur:
-            await cur.execute("select summary from summaries where post_id=%s", (post_id,))
-            cached = await cur.fetchone()
-        if cached:
-            return {"post_id": post_id, "summary": cached[0], "cached": True}
-
-        text: Optional[str] = post[1]
-        if text is None or len(text) <= 500:
-            return {"post_id": post_id, "summary": text or "", "cached": False}
-
-        result = await summarize(text, model_id=model)
-        async with conn.cursor() as cur:
-            await cur.execute(
-                "insert into summaries (post_id, model_id, summary, tokens) values (%s, %s, %s, %s) on conflict (post_id) do update set summary=excluded.summary, model_id=excluded.model_id",
-                (post_id, model or "", result, 0),
-            )
-        return {"post_id": post_id, "summary": result, "cached": False}
+    post = await fetch_one("select id, text from posts where id=%s", post_id)
+    if not post:
+        raise HTTPException(status_code=404, detail="Post not found")
 
+    text: Optional[str] = post["text"]
+    if not needs_model_summary(text):
+        return {"post_id": post_id, "summary": text or "", "cached": False}
 
+    # Pre-summarized at ingest, shared with a repost, or joined onto a call already in flight
+    result, cached = await get_or_create_summary(post_id, text, model_id=model)
+    return {"post_id": post_id, "summary": result, "cached": cached}
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.get("/posts/{post_id}/summarize/stream")
+async def summarize_post_stream(post_id: int, model: Optional[str] = None) -> StreamingResponse:
+    """Server-Sent Events: ``token`` events as the provider writes, then one ``done`` event."""
+    post = await fetch_one("select id, text from posts where id=%s", post_id)
+    if not post:
+        raise HTTPException(status_code=404, detail="Post not found")
+    text: Optional[str] = post["text"]
+
+    async def events() -> AsyncIterator[str]:
+        if not needs_model_summary(text):
+            yield _sse("done", {"post_id": post_id, "summary": text or "", "cached": False})
+            return
+        try:
+            async for item in stream_summary(post_id, text, model_id=model):
+                if item["event"] == "token":
+                    yield _sse("token", {"text": item["text"]})
+                else:
+                    yield _sse("done", {"post_id": post_id, "summary": item["summary"], "cached": item["cached"]})
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("Streaming summary failed", extra={"post_id": post_id})
+            yield _sse("error", {"post_id": post_id, "detail": str(exc)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
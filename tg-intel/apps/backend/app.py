@@ -1,3 +1,5 @@
+import time
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -5,11 +7,20 @@ from fastapi.requests import Request
 
 from apps.backend.api.channels import router as channels_router
 from apps.backend.api.posts import router as posts_router
+from apps.backend.api.search import router as search_router
+from apps.backend.api.export import router as export_router
+from apps.backend.api.archive import router as archive_router
+from apps.backend.api.analytics import router as analytics_router
 from apps.backend.api.summaries import router as summaries_router
 from apps.backend.core.config import settings
 from apps.backend.core.logger import logger
+from apps.backend.core.metrics import HTTP_REQUEST_SECONDS, metrics_response
 from apps.backend.core.db import init_pool, close_pool
-from apps.backend.services.fetcher import get_scheduler, schedule_periodic_fetch, schedule_job_processor, enqueue_initial_fetch_jobs
+from apps.backend.services.fetcher import get_scheduler, schedule_periodic_fetch, start_fetch_workers, stop_fetch_workers, enqueue_initial_fetch_jobs
+from apps.backend.services.live import start_live_ingestion, stop_live_ingestion
+from apps.backend.services.summarizer import start_summary_workers, stop_summary_workers
+from apps.backend.services.maintenance import schedule_maintenance
+from apps.backend.services.ai import close_http_client
 
 app = FastAPI(title="tg-intel API")
 
@@ -23,13 +34,37 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Route templates (/api/channels/{channel_id}) keep the label set bounded
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.labels(request.method, getattr(route, "path", "unmatched"), str(status)).observe(time.perf_counter() - started)
+
+
 @app.get("/healthz")
 async def healthz():
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus exposition of ingestion, queue, pool, Telegram, summarization and HTTP metrics."""
+    return await metrics_response()
+
+
 app.include_router(channels_router, prefix="/api/channels", tags=["channels"])
 app.include_router(posts_router, prefix="/api", tags=["posts"])
+app.include_router(search_router, prefix="/api", tags=["search"])
+app.include_router(export_router, prefix="/api", tags=["export"])
+app.include_router(archive_router, prefix="/api", tags=["archive"])
+app.include_router(analytics_router, prefix="/api", tags=["analytics"])
 app.include_router(summaries_router, prefix="/api", tags=["summaries"])
 
 
@@ -38,7 +73,7 @@ async def on_startup() -> None:
     # init DB pool if DSN is present
     db_ready = False
     if settings.supabase_db_url:
-        await init_pool(settings.supabase_db_url)
+        await init_pool(settings.supabase_db_url, max_size=settings.db_pool_max_size)
         db_ready = True
     # Start scheduler only if DB is ready
     if db_ready:
@@ -47,12 +82,19 @@ async def on_startup() -> None:
             if not sch.running:
                 sch.start()
             schedule_periodic_fetch()
-            schedule_job_processor()
+            schedule_maintenance()
+            start_fetch_workers()
+            start_summary_workers()
             # Enqueue initial fetch jobs for pending channels
             try:
                 await enqueue_initial_fetch_jobs()
             except Exception as e:
                 logger.warning(f"Could not enqueue initial fetch jobs: {e}")
+            if settings.tg_live_updates:
+                try:
+                    await start_live_ingestion()
+                except Exception as e:
+                    logger.warning(f"Could not start live updates: {e}")
         except Exception as e:
             logger.warning(f"Could not start scheduler: {e}")
     else:
@@ -67,6 +109,13 @@ async def on_shutdown() -> None:
         sch.shutdown(wait=False)
     except Exception:
         pass
+    try:
+        await stop_live_ingestion()
+    except Exception:
+        pass
+    await stop_fetch_workers()
+    await stop_summary_workers()
+    await close_http_client()
     await close_pool()
 
 
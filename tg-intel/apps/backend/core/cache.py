@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable, Iterable
+import hashlib
+import json
+import time
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from apps.backend.core.config import settings
+
+
+@dataclass
+class CacheEntry:
+    body: bytes
+    etag: str
+    tags: tuple[str, ...]
+    expires_at: float
+
+
+class ResponseCache:
+    """Size-bounded LRU of serialized responses with a TTL and tag invalidation.
+
+    Tags name the data an entry was built from (``"channels"``,
+    ``"channel:<id>"``); writers call ``invalidate`` with the tags they touched.
+    Every tag carries a version so a response computed while an invalidation
+    was in flight is not stored.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._versions: dict[str, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, key: Hashable) -> "CacheEntry | None":
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def versions(self, tags: Iterable[str]) -> tuple[int, ...]:
+        return tuple(self._versions.get(tag, 0) for tag in tags)
+
+    def put(self, key: Hashable, body: bytes, tags: tuple[str, ...], versions: tuple[int, ...]) -> CacheEntry:
+        entry = CacheEntry(
+            body=body,
+            etag='"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"',
+            tags=tags,
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+        if self.enabled and self.versions(tags) == versions:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, *tags: str) -> None:
+        for tag in tags:
+            self._versions[tag] = self._versions.get(tag, 0) + 1
+        dropped = set(tags)
+        for key in [k for k, e in self._entries.items() if dropped.intersection(e.tags)]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+response_cache = ResponseCache(settings.response_cache_max_entries, settings.response_cache_ttl_seconds)
+
+
+def channel_tag(channel_id: int) -> str:
+    return f"channel:{channel_id}"
+
+
+def _etag_matches(if_none_match: "str | None", etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or any(c.removeprefix("W/") == etag for c in candidates)
+
+
+async def cached_json(
+    request: Request,
+    key: Hashable,
+    tags: tuple[str, ...],
+    response_type: Any,
+    produce: Callable[[], Awaitable[Any]],
+) -> Response:
+    """Serve ``produce()`` as JSON through ``response_cache`` with ETag revalidation.
+
+    ``response_type`` is the route's response model; the payload is validated
+    against it once, when the entry is built, and served as stored bytes after.
+    """
+    entry = response_cache.get(key)
+    if entry is None:
+        versions = response_cache.versions(tags)
+        adapter = TypeAdapter(response_type)
+        payload = adapter.dump_python(adapter.validate_python(await produce()), mode="json")
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+        entry = response_cache.put(key, body, tags, versions)
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
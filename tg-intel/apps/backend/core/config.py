@@ -12,15 +12,58 @@ class Settings:
     supabase_url: "str | None" = os.getenv("SUPABASE_URL")
     supabase_db_url: "str | None" = os.getenv("SUPABASE_DB_URL")
     port: int = int(os.getenv("BACKEND_PORT", "8000"))
+    # Fallback polling interval for channels without a learned cadence
     cron_fetch_minutes: int = int(os.getenv("CRON_FETCH_MINUTES", "5"))
+    # Adaptive per-channel scheduling bounds and how often due channels are enqueued
+    fetch_min_interval_minutes: int = int(os.getenv("FETCH_MIN_INTERVAL_MINUTES", "2"))
+    fetch_max_interval_minutes: int = int(os.getenv("FETCH_MAX_INTERVAL_MINUTES", "360"))
+    fetch_scheduler_tick_seconds: int = int(os.getenv("FETCH_SCHEDULER_TICK_SECONDS", "60"))
+    # Engagement refresh: posts older than this are never re-polled; max posts per metrics job
+    metrics_refresh_max_age_days: int = int(os.getenv("METRICS_REFRESH_MAX_AGE_DAYS", "30"))
+    metrics_refresh_limit: int = int(os.getenv("METRICS_REFRESH_LIMIT", "500"))
+    # Monthly partitions of the engagement history older than this are dropped (0 keeps everything)
+    snapshot_retention_months: int = int(os.getenv("SNAPSHOT_RETENTION_MONTHS", "0"))
+    # Months of posts kept in the database (0 = all); older monthly partitions are archived to Parquet files here
+    posts_retention_months: int = int(os.getenv("POSTS_RETENTION_MONTHS", "0"))
+    posts_archive_dir: str = os.getenv("POSTS_ARCHIVE_DIR", "./data/archive")
+    # Number of messages written to posts per round trip
+    fetch_batch_size: int = int(os.getenv("FETCH_BATCH_SIZE", "200"))
+    # Fetch job worker pool; each busy worker holds one DB connection
+    fetch_workers: int = int(os.getenv("FETCH_WORKERS", "4"))
+    fetch_poll_seconds: float = float(os.getenv("FETCH_POLL_SECONDS", "5"))
+    fetch_job_timeout_minutes: int = int(os.getenv("FETCH_JOB_TIMEOUT_MINUTES", "30"))
+    db_pool_max_size: int = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    # In-process cache for channel/post listings; writes in this process invalidate it, the TTL bounds staleness from others (0 disables)
+    response_cache_ttl_seconds: float = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "30"))
+    response_cache_max_entries: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
     # Telegram
     tg_api_id: "int | None" = int(os.getenv("TG_API_ID")) if os.getenv("TG_API_ID") else None
     tg_api_hash: "str | None" = os.getenv("TG_API_HASH")
     tg_session_path: str = os.getenv("TG_SESSION_PATH", "./.secrets/telethon.session")
+    # Comma-separated session files, one per account; channels are sharded across them
+    tg_session_paths: "list[str]" = [
+        p.strip() for p in (os.getenv("TG_SESSION_PATHS") or tg_session_path).split(",") if p.strip()
+    ]
     tg_proxy_url: "str | None" = os.getenv("TG_PROXY_URL")
+    # Shared Telegram request budget; longer flood waits re-queue the job instead of blocking
+    tg_rate_per_second: float = float(os.getenv("TG_RATE_PER_SECOND", "2"))
+    tg_rate_burst: int = int(os.getenv("TG_RATE_BURST", "5"))
+    tg_max_flood_wait_seconds: int = int(os.getenv("TG_MAX_FLOOD_WAIT_SECONDS", "30"))
+    tg_peer_cache_size: int = int(os.getenv("TG_PEER_CACHE_SIZE", "4096"))
+    # Push ingestion from update events for channels the account has joined
+    tg_live_updates: bool = os.getenv("TG_LIVE_UPDATES", "false").lower() == "true"
+    tg_live_lease_seconds: int = int(os.getenv("TG_LIVE_LEASE_SECONDS", "180"))
     # AI
     ai_summary_endpoint: "str | None" = os.getenv("AI_SUMMARY_ENDPOINT")
     ai_summary_model_id: "str | None" = os.getenv("AI_SUMMARY_MODEL_ID")
+    # Posts longer than this get a model summary; new ones are pre-summarized by background workers
+    summary_min_chars: int = int(os.getenv("SUMMARY_MIN_CHARS", "500"))
+    ai_summary_workers: int = int(os.getenv("AI_SUMMARY_WORKERS", "2"))
+    # Provider calls in flight per process, shared by the workers and the API
+    ai_max_concurrency: int = int(os.getenv("AI_MAX_CONCURRENCY", "4"))
+    # Longer inputs are summarized chunk by chunk in parallel, then the partial summaries once more
+    ai_max_input_tokens: int = int(os.getenv("AI_MAX_INPUT_TOKENS", "3000"))
+    ai_tokenizer_encoding: str = os.getenv("AI_TOKENIZER_ENCODING", "cl100k_base")
     # CORS
     _cors_origins_env: "str | None" = os.getenv("CORS_ORIGINS")
     cors_allow_credentials: bool = os.getenv("CORS_ALLOW_CREDENTIALS", "true").lower() == "true"
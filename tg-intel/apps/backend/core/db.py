@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from typing import Any, Optional
+import hashlib
 
 from psycopg_pool import AsyncConnectionPool
 from fastapi import HTTPException
@@ -24,6 +25,10 @@ async def close_pool() -> None:
         _pool = None
 
 
+def get_pool() -> Optional[AsyncConnectionPool]:
+    return _pool
+
+
 def require_pool() -> AsyncConnectionPool:
     if _pool is None:
         # Return clear API error instead of crashing when DB is not configured
@@ -65,6 +70,12 @@ async def execute(query: str, *args: Any) -> str:
             return "OK"
 
 
+def advisory_key(*parts: Any) -> int:
+    """Signed 64-bit id for ``pg_advisory_lock`` derived from ``parts``."""
+    digest = hashlib.blake2b(":".join(str(p) for p in parts).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
 # FastAPI dependency (if needed)
 async def get_db() -> AsyncConnectionPool:
     return require_pool()
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+from typing import Iterator
+
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from apps.backend.core.db import get_pool
+from apps.backend.core.logger import logger
+
+
+# Ingestion
+FETCH_JOB_SECONDS = Histogram(
+    "tg_intel_fetch_job_duration_seconds",
+    "Fetch job run time",
+    ["kind", "outcome"],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+FETCH_MESSAGES_PER_SECOND = Histogram(
+    "tg_intel_fetch_job_messages_per_second",
+    "Posts inserted (history) or refreshed (metrics) per second of a successful fetch job",
+    ["kind"],
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000),
+)
+
+# Job queues, read from the database at scrape time
+QUEUE_DEPTH = Gauge("tg_intel_queue_depth", "Jobs waiting or running", ["queue", "status"])
+QUEUE_OLDEST_AGE = Gauge("tg_intel_queue_oldest_age_seconds", "Age of the oldest queued job", ["queue"])
+_QUEUES = ("fetch_history", "fetch_metrics", "summary")
+
+# Telegram
+TELEGRAM_REQUEST_SECONDS = Histogram(
+    "tg_intel_telegram_request_duration_seconds",
+    "Telethon request latency, excluding the wait for the rate governor",
+    ["method"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+TELEGRAM_FLOOD_WAITS = Counter("tg_intel_telegram_flood_waits_total", "FLOOD_WAIT errors returned by Telegram", ["method"])
+TELEGRAM_FLOOD_WAIT_SECONDS = Counter("tg_intel_telegram_flood_wait_seconds_total", "Seconds Telegram asked to wait", ["method"])
+
+# Summarization
+SUMMARIZE_SECONDS = Histogram(
+    "tg_intel_summarize_duration_seconds",
+    "Summarization latency including map-reduce of long inputs",
+    ["mode", "outcome"],
+    buckets=(0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120),
+)
+SUMMARIZE_TOKENS = Histogram(
+    "tg_intel_summarize_tokens",
+    "Tokens spent per summary (input and output, all provider calls)",
+    ["mode"],
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768),
+)
+
+# HTTP
+HTTP_REQUEST_SECONDS = Histogram(
+    "tg_intel_http_request_duration_seconds",
+    "Time to response headers, by route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+
+class _PoolCollector(Collector):
+    """Connection pool counters from ``AsyncConnectionPool.get_stats()``, read at scrape time."""
+
+    def collect(self) -> Iterator:
+        pool = get_pool()
+        if pool is None:
+            return
+        stats = pool.get_stats()
+        gauges = {
+            "size": ("pool_size", "Connections managed by the pool"),
+            "available": ("pool_available", "Idle connections in the pool"),
+            "max": ("pool_max", "Maximum pool size"),
+            "requests_waiting": ("requests_waiting", "Requests currently waiting for a connection"),
+        }
+        for name, (key, doc) in gauges.items():
+            yield GaugeMetricFamily(f"tg_intel_db_pool_{name}", doc, value=stats.get(key, 0))
+        counters = {
+            "requests": ("requests_num", "Connections requested from the pool", 1),
+            "requests_queued": ("requests_queued", "Requests that had to wait for a connection", 1),
+            "requests_errors": ("requests_errors", "Requests that failed (timeout, pool closed)", 1),
+            "wait_seconds": ("requests_wait_ms", "Time spent waiting for a connection", 1000),
+            "usage_seconds": ("usage_ms", "Time connections spent checked out", 1000),
+        }
+        for name, (key, doc, scale) in counters.items():
+            yield CounterMetricFamily(f"tg_intel_db_pool_{name}", doc, value=stats.get(key, 0) / scale)
+
+
+REGISTRY.register(_PoolCollector())
+
+
+def observe_fetch_job(kind: str, outcome: str, seconds: float, processed: int = 0) -> None:
+    FETCH_JOB_SECONDS.labels(kind, outcome).observe(seconds)
+    if outcome == "success" and processed and seconds > 0:
+        FETCH_MESSAGES_PER_SECOND.labels(kind).observe(processed / seconds)
+
+
+def observe_flood_wait(method: str, seconds: int) -> None:
+    TELEGRAM_FLOOD_WAITS.labels(method).inc()
+    TELEGRAM_FLOOD_WAIT_SECONDS.labels(method).inc(seconds)
+
+
+async def refresh_queue_metrics() -> None:
+    pool = get_pool()
+    if pool is None:
+        return
+    async with pool.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                select 'fetch_' || kind, status, count(*), extract(epoch from now() - min(created_at))
+                from fetch_jobs where status in ('queued','running') group by 1, 2
+                union all
+                select 'summary', status, count(*), extract(epoch from now() - min(created_at))
+                from summary_jobs where status in ('queued','running') group by 1, 2
+                """
+            )
+            rows = await cur.fetchall()
+    for queue in _QUEUES:
+        QUEUE_OLDEST_AGE.labels(queue).set(0)
+        for status in ("queued", "running"):
+            QUEUE_DEPTH.labels(queue, status).set(0)
+    for queue, status, depth, oldest in rows:
+        QUEUE_DEPTH.labels(queue, status).set(depth)
+        if status == "queued":
+            QUEUE_OLDEST_AGE.labels(queue).set(float(oldest or 0))
+
+
+async def metrics_response() -> Response:
+    try:
+        await refresh_queue_metrics()
+    except Exception as e:  # noqa: BLE001
+        logger.warning(f"Could not read queue metrics: {e}")
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
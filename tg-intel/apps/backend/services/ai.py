@@ -1,38 +1,300 @@
 from __future__ import annotations
 
-from typing import Any, Optional
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Optional
+import asyncio
+import json
+import math
+import re
+import time
 
 import httpx
 
 from apps.backend.core.config import settings
+from apps.backend.core.logger import logger
+from apps.backend.core.metrics import SUMMARIZE_SECONDS, SUMMARIZE_TOKENS
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - optional; token counts fall back to an estimate
+    tiktoken = None
 
 
 class SummarizationError(RuntimeError):
     pass
 
 
-async def summarize(text: str, model_id: Optional[str] = None, max_tokens: int = 256, lang: str = "ru") -> str:
+@dataclass
+class SummaryResult:
+    summary: str = ""
+    # Provider-reported usage when available, otherwise counted locally (input + output)
+    tokens: int = 0
+
+
+_client: Optional[httpx.AsyncClient] = None
+_slots: Optional[asyncio.Semaphore] = None
+_encoding: Any = None
+_encoding_loaded = False
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared keep-alive client, so provider calls reuse pooled connections."""
+    global _client
+    if _client is None or _client.is_closed:
+        limits = httpx.Limits(
+            max_connections=settings.ai_max_concurrency,
+            max_keepalive_connections=settings.ai_max_concurrency,
+        )
+        _client = httpx.AsyncClient(timeout=60, limits=limits)
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _provider_slots() -> asyncio.Semaphore:
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(settings.ai_max_concurrency)
+    return _slots
+
+
+def provider_configured() -> bool:
+    return bool(settings.ai_summary_endpoint and settings.ai_summary_model_id)
+
+
+def _get_encoding() -> Any:
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        if tiktoken is not None:
+            try:
+                _encoding = tiktoken.get_encoding(settings.ai_tokenizer_encoding)
+            except Exception as e:  # noqa: BLE001
+                logger.warning(f"Tokenizer {settings.ai_tokenizer_encoding} unavailable, estimating token counts: {e}")
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
     if not text:
-        return ""
-    if model_id is None:
-        model_id = settings.ai_summary_model_id or ""
-    endpoint = settings.ai_summary_endpoint
-    if not endpoint or not model_id:
-        # No provider configured; return a simple truncation as placeholder
-        return text[: max_tokens * 4]
+        return 0
+    enc = _get_encoding()
+    if enc is None:
+        # Conservative for Cyrillic, which tokenizes to roughly 2-3 characters per token
+        return math.ceil(len(text) / 3)
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def _pack(pieces: list[str], sep: str, max_tokens: int) -> list[str]:
+    """Greedily join ``pieces`` into chunks of at most ``max_tokens``, splitting oversized pieces further."""
+    chunks: list[str] = []
+    current = ""
+    for piece in pieces:
+        candidate = f"{current}{sep}{piece}" if current else piece
+        if count_tokens(candidate) <= max_tokens:
+            current = candidate
+            continue
+        if current:
+            chunks.append(current)
+        if count_tokens(piece) <= max_tokens:
+            current = piece
+        else:
+            chunks.extend(split_for_model(piece, max_tokens))
+            current = ""
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_for_model(text: str, max_tokens: int) -> list[str]:
+    """Split text into chunks of at most ``max_tokens`` at paragraph, then sentence, then word boundaries."""
+    if count_tokens(text) <= max_tokens:
+        return [text]
+    paragraphs = [p for p in re.split(r"\n\s*\n|\n", text) if p.strip()]
+    if len(paragraphs) > 1:
+        return _pack(paragraphs, "\n", max_tokens)
+    sentences = [s for s in re.split(r"(?<=[.!?…])\s+", text) if s]
+    if len(sentences) > 1:
+        return _pack(sentences, " ", max_tokens)
+    words = text.split()
+    if len(words) > 1:
+        return _pack(words, " ", max_tokens)
+    # A single unbroken token run: cut by characters
+    step = max(1, len(text) * max_tokens // max(count_tokens(text), 1))
+    return [text[i:i + step] for i in range(0, len(text), step)]
+
+
+def _usage_tokens(data: Any) -> Optional[int]:
+    if not isinstance(data, dict):
+        return None
+    usage = data.get("usage")
+    if isinstance(usage, dict):
+        if usage.get("total_tokens") is not None:
+            return int(usage["total_tokens"])
+        parts = [usage.get(k) for k in ("prompt_tokens", "completion_tokens", "input_tokens", "output_tokens")]
+        if any(p is not None for p in parts):
+            return sum(int(p) for p in parts if p is not None)
+    if isinstance(data.get("tokens"), int):
+        return data["tokens"]
+    return None
+
 
+def _payload(text: str, model_id: str, max_tokens: int, lang: str, stream: bool = False) -> dict:
     payload = {
         "model": model_id,
         "max_tokens": max_tokens,
         "lang": lang,
         "input": text,
     }
-    async with httpx.AsyncClient(timeout=60) as client:
-        resp = await client.post(endpoint, json=payload)
-        if resp.status_code != 200:
-            raise SummarizationError(f"Provider error: {resp.status_code} {resp.text}")
-        data: Any = resp.json()
-        # Expect either { summary: "..." } or provider-specific
-        return data.get("summary") or data.get("output") or ""
+    if stream:
+        payload["stream"] = True
+    return payload
+
+
+async def _summarize_once(text: str, model_id: str, max_tokens: int, lang: str) -> SummaryResult:
+    # At most AI_MAX_CONCURRENCY calls in flight; the rest wait here rather than in the pool
+    async with _provider_slots():
+        resp = await get_http_client().post(settings.ai_summary_endpoint, json=_payload(text, model_id, max_tokens, lang))
+    if resp.status_code != 200:
+        raise SummarizationError(f"Provider error: {resp.status_code} {resp.text}")
+    data: Any = resp.json()
+    # Expect either { summary: "..." } or provider-specific
+    summary = data.get("summary") or data.get("output") or ""
+    tokens = _usage_tokens(data)
+    if tokens is None:
+        tokens = count_tokens(text) + count_tokens(summary)
+    return SummaryResult(summary=summary, tokens=tokens)
+
+
+async def _reduce_input(text: str, model_id: str, max_tokens: int, lang: str) -> tuple[str, int]:
+    """Map step: summarize over-length text chunk by chunk until the joined partials fit one call.
+
+    Returns the text for the final call and the tokens spent getting there.
+    """
+    spent = 0
+    limit = settings.ai_max_input_tokens
+    while count_tokens(text) > limit:
+        chunks = split_for_model(text, limit)
+        partials = await asyncio.gather(*(_summarize_once(c, model_id, max_tokens, lang) for c in chunks))
+        spent += sum(p.tokens for p in partials)
+        text = "\n\n".join(p.summary for p in partials if p.summary)
+        if len(chunks) == 1:
+            break
+    return text, spent
+
+
+async def summarize(text: str, model_id: Optional[str] = None, max_tokens: int = 256, lang: str = "ru") -> SummaryResult:
+    """Summarize text, map-reducing inputs longer than ``AI_MAX_INPUT_TOKENS``.
+
+    Chunks are summarized in parallel (bounded by ``AI_MAX_CONCURRENCY``) and
+    the joined partial summaries are summarized once more.
+    """
+    if not text:
+        return SummaryResult()
+    if model_id is None:
+        model_id = settings.ai_summary_model_id or ""
+    endpoint = settings.ai_summary_endpoint
+    if not endpoint or not model_id:
+        # No provider configured; return a simple truncation as placeholder
+        return SummaryResult(summary=text[: max_tokens * 4])
+
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        reduced, spent = await _reduce_input(text, model_id, max_tokens, lang)
+        result = await _summarize_once(reduced, model_id, max_tokens, lang)
+        result.tokens += spent
+        outcome = "ok"
+    finally:
+        SUMMARIZE_SECONDS.labels("summarize", outcome).observe(time.perf_counter() - started)
+    SUMMARIZE_TOKENS.labels("summarize").observe(result.tokens)
+    return result
+
+
+def _stream_delta(event: Any) -> str:
+    """Text carried by one streamed provider event (plain token fields or OpenAI-style deltas)."""
+    if not isinstance(event, dict):
+        return ""
+    for key in ("token", "delta", "text", "summary", "output"):
+        if isinstance(event.get(key), str):
+            return event[key]
+    choices = event.get("choices") or []
+    if choices and isinstance(choices[0], dict):
+        return (choices[0].get("delta") or {}).get("content") or ""
+    return ""
+
+
+async def summarize_stream(
+    text: str,
+    model_id: Optional[str] = None,
+    max_tokens: int = 256,
+    lang: str = "ru",
+    result: Optional[SummaryResult] = None,
+) -> AsyncIterator[str]:
+    """Like ``summarize`` but yields the summary in pieces as the provider produces them.
+
+    The request asks for ``stream: true`` and reads ``data:`` lines of a
+    text/event-stream reply; a provider that answers with plain JSON instead
+    yields its whole summary as a single piece. Over-length inputs run the map
+    step first and stream only the final call. ``result``, when given, holds
+    the full summary and token usage once the iteration ends.
+    """
+    result = result if result is not None else SummaryResult()
+    if not text:
+        return
+    if model_id is None:
+        model_id = settings.ai_summary_model_id or ""
+    endpoint = settings.ai_summary_endpoint
+    if not endpoint or not model_id:
+        result.summary = text[: max_tokens * 4]
+        yield result.summary
+        return
+
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        async for piece in _stream_pieces(text, model_id, max_tokens, lang, endpoint, result):
+            yield piece
+        outcome = "ok"
+    finally:
+        SUMMARIZE_SECONDS.labels("stream", outcome).observe(time.perf_counter() - started)
+    SUMMARIZE_TOKENS.labels("stream").observe(result.tokens)
 
 
+async def _stream_pieces(text: str, model_id: str, max_tokens: int, lang: str, endpoint: str, result: SummaryResult) -> AsyncIterator[str]:
+    reduced, spent = await _reduce_input(text, model_id, max_tokens, lang)
+    parts: list[str] = []
+    usage: Optional[int] = None
+    async with _provider_slots():
+        async with get_http_client().stream("POST", endpoint, json=_payload(reduced, model_id, max_tokens, lang, stream=True)) as resp:
+            if resp.status_code != 200:
+                body = (await resp.aread()).decode(errors="replace")
+                raise SummarizationError(f"Provider error: {resp.status_code} {body}")
+            if not resp.headers.get("content-type", "").startswith("text/event-stream"):
+                data: Any = json.loads(await resp.aread())
+                parts.append(data.get("summary") or data.get("output") or "")
+                usage = _usage_tokens(data)
+                yield parts[-1]
+            else:
+                async for line in resp.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    chunk = line[len("data:"):].strip()
+                    if chunk == "[DONE]":
+                        break
+                    event = json.loads(chunk)
+                    event_usage = _usage_tokens(event)
+                    if event_usage is not None:
+                        usage = event_usage
+                    piece = _stream_delta(event)
+                    if piece:
+                        parts.append(piece)
+                        yield piece
+    result.summary = "".join(parts)
+    if usage is None:
+        usage = count_tokens(reduced) + count_tokens(result.summary)
+    result.tokens = spent + usage
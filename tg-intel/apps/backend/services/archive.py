@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Optional
+import asyncio
+import os
+
+from apps.backend.core.cache import channel_tag, response_cache
+from apps.backend.core.config import settings
+from apps.backend.core.logger import logger
+from apps.backend.services.export import EXPORT_COLUMNS
+from apps.backend.services.partitions import forget_post_partition
+
+# Archived files keep every stored column except the derived text_tsv
+_ARCHIVE_COLUMNS = EXPORT_COLUMNS + ("raw", "summary_id", "metrics_refreshed_at")
+
+_BATCH_ROWS = 5000
+
+
+def _archive_schema() -> Any:
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.int64()),
+        ("channel_id", pa.int64()),
+        ("tg_message_id", pa.int64()),
+        ("posted_at", pa.timestamp("us", tz="UTC")),
+        ("text", pa.string()),
+        ("views", pa.int32()),
+        ("forwards", pa.int32()),
+        ("replies", pa.int32()),
+        ("reactions", pa.int32()),
+        ("raw", pa.string()),
+        ("summary_id", pa.int64()),
+        ("metrics_refreshed_at", pa.timestamp("us", tz="UTC")),
+    ])
+
+
+async def _write_parquet(conn: Any, partition: str, path: Path) -> int:
+    """Copy one partition into a Parquet file (row group per cursor batch); returns the row count."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _archive_schema()
+    select = ", ".join("raw::text" if c == "raw" else c for c in _ARCHIVE_COLUMNS)
+    rows_written = 0
+    writer = pq.ParquetWriter(str(path), schema, compression="zstd")
+    try:
+        async with conn.transaction():
+            async with conn.cursor(name="posts_archive") as cur:
+                await cur.execute(f'select {select} from "{partition}" order by id')
+                while rows := await cur.fetchmany(_BATCH_ROWS):
+                    columns = list(zip(*rows))
+                    table = pa.Table.from_arrays([pa.array(col, type=f.type) for col, f in zip(columns, schema)], schema=schema)
+                    await asyncio.to_thread(writer.write_table, table)
+                    rows_written += len(rows)
+    finally:
+        await asyncio.to_thread(writer.close)
+    return rows_written
+
+
+async def archive_partition(conn: Any, partition: str, month: date) -> None:
+    """Archive a month of posts to ``POSTS_ARCHIVE_DIR`` and detach it from ``posts``.
+
+    The Parquet file is complete on disk before anything is removed. Then, in
+    one transaction, the month is recorded in ``post_archives``, channel post
+    counts are reduced, summary jobs and summary back-references to its posts
+    are cleared, and the partition is detached and dropped. Activity rollups
+    are kept, so analytics still cover archived months.
+    """
+    archive_dir = Path(settings.posts_archive_dir)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    path = archive_dir / f"{partition}-{stamp}.parquet"
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        rows = await _write_parquet(conn, partition, tmp)
+        await asyncio.to_thread(os.replace, tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+    try:
+        async with conn.transaction():
+            async with conn.cursor() as cur:
+                # Detaching locks posts exclusively; give up rather than queue ingestion behind it
+                await cur.execute("set local lock_timeout = '5s'")
+                await cur.execute(f'select channel_id, count(*) from "{partition}" group by channel_id')
+                per_channel = await cur.fetchall()
+                await cur.execute(
+                    """
+                    update channels c set post_count = greatest(c.post_count - x.n, 0)
+                    from unnest(%s::bigint[], %s::bigint[]) as x(channel_id, n)
+                    where c.id = x.channel_id
+                    """,
+                    ([r[0] for r in per_channel], [r[1] for r in per_channel]),
+                )
+                await cur.execute(f'delete from summary_jobs where post_id in (select id from "{partition}")')
+                await cur.execute(f'update summaries set post_id = null where post_id in (select id from "{partition}")')
+                await cur.execute(
+                    """
+                    insert into post_archives (month, file_name, rows, bytes, channel_ids)
+                    values (%s, %s, %s, %s, %s)
+                    """,
+                    (
+                        datetime(month.year, month.month, 1, tzinfo=timezone.utc),
+                        path.name,
+                        rows,
+                        path.stat().st_size,
+                        [r[0] for r in per_channel],
+                    ),
+                )
+                await cur.execute(f'alter table posts detach partition "{partition}"')
+                await cur.execute(f'drop table "{partition}"')
+    except BaseException:
+        # Nothing was removed; the next run writes a fresh file
+        path.unlink(missing_ok=True)
+        raise
+
+    forget_post_partition(month)
+    response_cache.invalidate("channels", *(channel_tag(r[0]) for r in per_channel))
+    logger.info(f"Archived {rows} posts of {month:%Y-%m} to {path}")
+
+
+async def archived_months(
+    conn: Any,
+    channel_ids: Optional[list[int]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> list[dict]:
+    """Catalog entries of archived months overlapping ``[since, until)`` that hold any of ``channel_ids``."""
+    filters: list[str] = []
+    params: list[Any] = []
+    if channel_ids:
+        filters.append("channel_ids && %s::bigint[]")
+        params.append(channel_ids)
+    if since is not None:
+        filters.append("month > %s::timestamptz - interval '1 month'")
+        params.append(since)
+    if until is not None:
+        filters.append("month < %s")
+        params.append(until)
+    where = " and ".join(filters) or "true"
+    async with conn.cursor() as cur:
+        await cur.execute(
+            f"select month, file_name, rows, bytes, channel_ids, archived_at from post_archives where {where} order by month, id",
+            params,
+        )
+        names = [d.name for d in cur.description]
+        return [dict(zip(names, row)) for row in await cur.fetchall()]
+
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Naive bounds are read as UTC, like the rest of the API
+    return value.replace(tzinfo=timezone.utc) if value is not None and value.tzinfo is None else value
+
+
+def _archive_filter(
+    channel_ids: Optional[list[int]],
+    since: Optional[datetime],
+    until: Optional[datetime],
+    query: Optional[str],
+) -> Any:
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+    expr = None
+    conditions: list[Any] = []
+    if channel_ids:
+        conditions.append(ds.field("channel_id").isin(channel_ids))
+    if since is not None:
+        conditions.append(ds.field("posted_at") >= since)
+    if until is not None:
+        conditions.append(ds.field("posted_at") < until)
+    if query:
+        # No tsvector in the archive: plain case-insensitive substring match
+        conditions.append(pc.match_substring(ds.field("text"), query, ignore_case=True))
+    for c in conditions:
+        expr = c if expr is None else expr & c
+    return expr
+
+
+async def read_archived_posts(
+    conn: Any,
+    channel_ids: Optional[list[int]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    query: Optional[str] = None,
+) -> AsyncIterator[list[tuple]]:
+    """Batches of archived posts (``EXPORT_COLUMNS`` rows, by month then id) matching the filters.
+
+    Only files whose month and channels overlap the request are opened, and
+    they are scanned batch by batch with the filters pushed down to row groups.
+    """
+    import pyarrow.dataset as ds
+
+    since, until = _utc(since), _utc(until)
+    archive_dir = Path(settings.posts_archive_dir)
+    entries = await archived_months(conn, channel_ids, since, until)
+    expr = _archive_filter(channel_ids, since, until, query)
+    for entry in entries:
+        path = archive_dir / entry["file_name"]
+        if not path.exists():
+            logger.warning(f"Archived file {path} is missing")
+            continue
+        scanner = ds.dataset(str(path), format="parquet").scanner(columns=list(EXPORT_COLUMNS), filter=expr, batch_size=_BATCH_ROWS)
+        batches = iter(scanner.to_batches())
+        while (batch := await asyncio.to_thread(next, batches, None)) is not None:
+            if batch.num_rows:
+                yield list(zip(*(col.to_pylist() for col in batch.columns)))
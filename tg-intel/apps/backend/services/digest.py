@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Optional
+import asyncio
+
+from apps.backend.core.config import settings
+from apps.backend.core.db import require_pool
+from apps.backend.services.ai import summarize
+from apps.backend.services.summarizer import effective_model, get_or_create_summary, needs_model_summary
+
+
+def window_bucket(since: datetime) -> datetime:
+    """Digests are stored per hour: requests within the same hour share one."""
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return since.replace(minute=0, second=0, microsecond=0)
+
+
+async def _post_line(
+    slots: asyncio.Semaphore,
+    post_id: int,
+    posted_at: Optional[datetime],
+    text: Optional[str],
+    summary: Optional[str],
+) -> str:
+    if summary is None and needs_model_summary(text):
+        # Only as many provider calls at once as the provider accepts
+        async with slots:
+            summary, _ = await get_or_create_summary(post_id, text)
+    stamp = posted_at.strftime("%Y-%m-%d %H:%M") if posted_at else "?"
+    return f"[{stamp}] {summary if summary is not None else (text or '').strip()}"
+
+
+async def channel_digest(channel_id: int, since: datetime, model_id: Optional[str] = None) -> dict:
+    """Digest of a channel's posts from the window bucket of ``since`` up to now.
+
+    A stored digest for the bucket is extended with posts added after its
+    watermark only: each new post contributes its existing summary (long
+    posts without one are summarized first) or its text, and the model folds
+    them into the previous digest. No pool connection is held across provider
+    calls; the result is written only if the watermark it extends is still
+    the stored one, and otherwise the newer digest is extended instead.
+    """
+    model_id = effective_model(model_id)
+    window_start = window_bucket(since)
+    pool = require_pool()
+    while True:
+        async with pool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    "select digest, last_post_id, post_count, tokens, updated_at from channel_digests where channel_id=%s and window_start=%s and model_id=%s",
+                    (channel_id, window_start, model_id),
+                )
+                stored = await cur.fetchone()
+                digest, last_post_id, post_count, tokens, updated_at = stored or ("", 0, 0, 0, None)
+                await cur.execute(
+                    """
+                    select p.id, p.posted_at, p.text, s.summary
+                    from posts p
+                    left join summaries s on s.id = p.summary_id
+                    where p.channel_id=%s and p.posted_at >= %s and p.id > %s
+                    order by p.posted_at, p.id
+                    """,
+                    (channel_id, window_start, last_post_id),
+                )
+                new_posts = await cur.fetchall()
+        if not new_posts:
+            break
+
+        slots = asyncio.Semaphore(settings.ai_max_concurrency)
+        lines = await asyncio.gather(*(_post_line(slots, *row) for row in new_posts))
+        parts = [digest] if digest else []
+        parts += [line for line in lines if line.strip()]
+        result = await summarize("\n\n".join(parts), model_id=model_id or None)
+
+        async with pool.connection() as conn:
+            async with conn.cursor() as cur:
+                # Compare-and-set on the watermark: a concurrent request that stored first wins
+                await cur.execute(
+                    """
+                    insert into channel_digests as d (channel_id, window_start, model_id, digest, last_post_id, post_count, tokens)
+                    values (%s, %s, %s, %s, %s, %s, %s)
+                    on conflict (channel_id, window_start, model_id) do update
+                      set digest=excluded.digest, last_post_id=excluded.last_post_id, post_count=excluded.post_count,
+                          tokens=excluded.tokens, updated_at=now()
+                      where d.last_post_id = %s
+                    returning updated_at
+                    """,
+                    (
+                        channel_id, window_start, model_id, result.summary, max(row[0] for row in new_posts),
+                        post_count + len(new_posts), tokens + result.tokens, last_post_id,
+                    ),
+                )
+                row = await cur.fetchone()
+        if row is not None:
+            digest = result.summary
+            post_count += len(new_posts)
+            updated_at = row[0]
+            break
+
+    return {
+        "channel_id": channel_id,
+        "window_start": window_start.isoformat(),
+        "digest": digest,
+        "post_count": post_count,
+        "new_posts": len(new_posts),
+        "cached": not new_posts,
+        "updated_at": updated_at.isoformat() if updated_at else None,
+    }
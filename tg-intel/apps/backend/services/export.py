@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, AsyncIterator, Optional
+import csv
+import io
+import json
+
+# Columns written by every format, in order
+EXPORT_COLUMNS = ("id", "channel_id", "tg_message_id", "posted_at", "text", "views", "forwards", "replies", "reactions")
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# Rows pulled from the server-side cursor per round trip (and per Parquet row group)
+_BATCH_ROWS = 5000
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _export_query(
+    channel_ids: Optional[list[int]],
+    since: Optional[datetime],
+    until: Optional[datetime],
+    query: Optional[str],
+) -> tuple[str, list[Any]]:
+    filters: list[str] = []
+    params: list[Any] = []
+    if channel_ids:
+        filters.append("channel_id = any(%s)")
+        params.append(channel_ids)
+    if since is not None:
+        filters.append("posted_at >= %s")
+        params.append(since)
+    if until is not None:
+        filters.append("posted_at < %s")
+        params.append(until)
+    if query:
+        filters.append("text_tsv @@ websearch_to_tsquery('simple', %s)")
+        params.append(query)
+    where = " and ".join(filters) or "true"
+    return f"select {', '.join(EXPORT_COLUMNS)} from posts where {where} order by id", params
+
+
+async def _row_batches(conn: Any, sql: str, params: list[Any]) -> AsyncIterator[list[tuple]]:
+    """Read through a named (server-side) cursor so memory stays flat whatever the result size."""
+    async with conn.transaction():
+        async with conn.cursor(name="posts_export") as cur:
+            await cur.execute(sql, params)
+            while True:
+                rows = await cur.fetchmany(_BATCH_ROWS)
+                if not rows:
+                    break
+                yield rows
+
+
+def _json_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def _ndjson(batches: AsyncIterator[list[tuple]]) -> AsyncIterator[bytes]:
+    async for rows in batches:
+        lines = [json.dumps(dict(zip(EXPORT_COLUMNS, map(_json_value, row))), ensure_ascii=False) for row in rows]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+async def _csv(batches: AsyncIterator[list[tuple]]) -> AsyncIterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_COLUMNS)
+    async for rows in batches:
+        writer.writerows([[_json_value(v) for v in row] for row in rows])
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate(0)
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+class _DrainSink:
+    """Write-only file for ParquetWriter that hands out bytes as they are written.
+
+    It tracks its own position, since Parquet footers record absolute offsets.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._pos = 0
+        self.closed = False
+
+    def write(self, data: Any) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        out = b"".join(self._chunks)
+        self._chunks.clear()
+        return out
+
+
+async def _parquet(batches: AsyncIterator[list[tuple]]) -> AsyncIterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("channel_id", pa.int64()),
+        ("tg_message_id", pa.int64()),
+        ("posted_at", pa.timestamp("us", tz="UTC")),
+        ("text", pa.string()),
+        ("views", pa.int32()),
+        ("forwards", pa.int32()),
+        ("replies", pa.int32()),
+        ("reactions", pa.int32()),
+    ])
+    sink = _DrainSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        async for rows in batches:
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays([pa.array(col, type=f.type) for col, f in zip(columns, schema)], schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+async def encode_batches(fmt: str, batches: AsyncIterator[list[tuple]]) -> AsyncIterator[bytes]:
+    """Encode batches of ``EXPORT_COLUMNS`` rows as ``fmt``, chunk by chunk."""
+    encoder = {"ndjson": _ndjson, "csv": _csv, "parquet": _parquet}[fmt]
+    async for chunk in encoder(batches):
+        if chunk:
+            yield chunk
+
+
+async def stream_export(
+    conn: Any,
+    fmt: str,
+    channel_ids: Optional[list[int]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    query: Optional[str] = None,
+) -> AsyncIterator[bytes]:
+    """Encode matching posts (ordered by id) as ``fmt`` chunk by chunk over one connection."""
+    sql, params = _export_query(channel_ids, since, until, query)
+    async for chunk in encode_batches(fmt, _row_batches(conn, sql, params)):
+        yield chunk
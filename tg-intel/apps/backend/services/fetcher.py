@@ -1,16 +1,21 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Any
 import asyncio
 import time
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
+from apps.backend.core.cache import channel_tag, response_cache
 from apps.backend.core.config import settings
 from apps.backend.core.logger import logger
 from apps.backend.core.db import require_pool
-from apps.backend.services.telegram import resolve_channel, fetch_history
+from apps.backend.core.metrics import observe_fetch_job
+from apps.backend.services.telegram import resolve_channel, fetch_history, fetch_message_metrics, known_peer, retry_delay
+from apps.backend.services.ratelimit import RateLimited
+from apps.backend.services.ai import provider_configured
+from apps.backend.services.partitions import ensure_post_partitions, posts_retention_cutoff
 from psycopg.types.json import Json
 from telethon.errors.rpcerrorlist import FloodWaitError, ChannelPrivateError
 
@@ -19,6 +24,22 @@ from typing import Optional
 from apps.backend.core.logger import logger
 
 scheduler: Optional[AsyncIOScheduler] = None
+_worker_tasks: list[asyncio.Task] = []
+
+
+async def enqueue_fetch_job(conn: Any, channel_id: int, kind: str = "history") -> bool:
+    """Queue a fetch job unless the channel already has one of that kind queued or running.
+
+    ``kind`` is ``history`` (new posts) or ``metrics`` (engagement refresh).
+    Returns True when a new job was inserted.
+    """
+    async with conn.cursor() as cur:
+        await cur.execute(
+            "insert into fetch_jobs (channel_id, status, kind) values (%s, 'queued', %s) "
+            "on conflict (channel_id, kind) where status in ('queued','running') do nothing returning id",
+            (channel_id, kind),
+        )
+        return await cur.fetchone() is not None
 
 
 async def enqueue_initial_fetch_jobs() -> None:
@@ -27,108 +48,326 @@ async def enqueue_initial_fetch_jobs() -> None:
         async with conn.cursor() as cur:
             await cur.execute("select id, tg_url from channels where status='pending' order by created_at asc")
             rows = await cur.fetchall()
-            for row in rows:
-                await cur.execute(
-                    "insert into fetch_jobs (channel_id, status) values (%s, 'queued')",
-                    (row[0],),
-                )
+        for row in rows:
+            await enqueue_fetch_job(conn, row[0])
+
+
+def compute_fetch_interval(avg_gap_s: Optional[float], silence_s: Optional[float]) -> int:
+    """Pick the next polling interval (seconds) from a channel's posting cadence.
+
+    Polls roughly twice per average gap between recent posts and backs off
+    when the channel has been quiet for longer than that. The result is
+    clamped to FETCH_MIN_INTERVAL_MINUTES..FETCH_MAX_INTERVAL_MINUTES.
+    """
+    lo = settings.fetch_min_interval_minutes * 60
+    hi = settings.fetch_max_interval_minutes * 60
+    candidates = [v / 2 for v in (avg_gap_s, silence_s) if v is not None]
+    interval = max(candidates) if candidates else hi
+    return int(min(max(interval, lo), hi))
+
+
+async def reschedule_channel(conn: Any, channel_id: int) -> int:
+    """Learn the channel's posting cadence and set its next due time."""
+    async with conn.cursor() as cur:
+        await cur.execute(
+            """
+            select extract(epoch from max(posted_at) - min(posted_at)) / nullif(count(*) - 1, 0),
+                   extract(epoch from now() - max(posted_at))
+            from (
+              select posted_at from posts
+              where channel_id=%s and posted_at is not null
+              order by posted_at desc limit 20
+            ) recent
+            """,
+            (channel_id,),
+        )
+        row = await cur.fetchone()
+    avg_gap_s = float(row[0]) if row and row[0] is not None else None
+    silence_s = float(row[1]) if row and row[1] is not None else None
+    interval = compute_fetch_interval(avg_gap_s, silence_s)
+    async with conn.cursor() as cur:
+        await cur.execute(
+            "update channels set fetch_interval_s=%s, next_fetch_at=now() + make_interval(secs => %s) where id=%s",
+            (interval, interval, channel_id),
+        )
+    return interval
+
+
+async def _defer_channel(conn: Any, channel_id: int) -> None:
+    # Failed fetches keep the learned interval instead of being retried on the next tick
+    async with conn.cursor() as cur:
+        await cur.execute(
+            "update channels set next_fetch_at=now() + make_interval(secs => coalesce(fetch_interval_s, %s)) where id=%s",
+            (settings.cron_fetch_minutes * 60, channel_id),
+        )
+
+
+# posts is partitioned by posted_at, which cannot be null; Telegram always dates messages
+_UNDATED = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _posted_at(msg: dict) -> datetime:
+    return datetime.fromisoformat(msg["date"]) if msg.get("date") else _UNDATED
+
+
+async def upsert_posts_batch(conn: Any, channel_id: int, batch: list[dict]) -> int:
+    """Upsert a batch of normalized messages (see ``message_to_dict``) in one round trip.
+
+    The rows are shipped as parallel arrays and expanded with ``unnest`` so
+    the batch costs a single statement regardless of its size; the same
+    statement bumps ``channels.post_count`` by the number of new rows so post
+    listings never have to count, and queues new long posts for background
+    summarization. Messages older than the retention cutoff are skipped, as
+    their months are archived. Returns the number of rows inserted or updated.
+    """
+    posted = [_posted_at(msg) for msg in batch]
+    cutoff = posts_retention_cutoff()
+    if cutoff is not None:
+        kept = [(msg, ts) for msg, ts in zip(batch, posted) if ts >= cutoff]
+        batch, posted = [m for m, _ in kept], [ts for _, ts in kept]
+    if not batch:
+        return 0
+    await ensure_post_partitions(conn, posted)
+    ids = [msg["id"] for msg in batch]
+    async with conn.cursor() as cur:
+        await cur.execute(
+            """
+            with known as (
+              -- xmax cannot be returned from a partitioned table, so new rows are told apart up front
+              select tg_message_id from posts
+              where channel_id = %s and tg_message_id = any(%s::bigint[]) and posted_at = any(%s::timestamptz[])
+            ), up as (
+            insert into posts (channel_id, tg_message_id, posted_at, text, raw,
+                               views, forwards, replies, reactions, metrics_refreshed_at)
+            select %s, m.tg_message_id, m.posted_at, m.text, m.raw,
+                   m.views, m.forwards, m.replies, m.reactions, now()
+            from unnest(%s::bigint[], %s::timestamptz[], %s::text[], %s::jsonb[],
+                        %s::int[], %s::int[], %s::int[], %s::int[])
+              as m(tg_message_id, posted_at, text, raw, views, forwards, replies, reactions)
+            on conflict (channel_id, tg_message_id, posted_at) do update
+              set text = excluded.text,
+                  -- raw is the message as first seen or last edited; keeping the old value
+                  -- reuses its TOAST data instead of rewriting it on every re-fetch
+                  raw = case when posts.text is distinct from excluded.text then excluded.raw else posts.raw end,
+                  views = excluded.views,
+                  forwards = excluded.forwards,
+                  replies = excluded.replies,
+                  reactions = excluded.reactions,
+                  metrics_refreshed_at = excluded.metrics_refreshed_at
+            returning id, tg_message_id not in (select tg_message_id from known) as inserted, char_length(text) as text_len
+            ), summarize as (
+              insert into summary_jobs (post_id)
+              select id from up where inserted and %s and text_len > %s
+              on conflict (post_id) do nothing
+            )
+            update channels set post_count = post_count + (select count(*) from up where inserted)
+            where id = %s
+            returning (select count(*) from up)
+            """,
+            (
+                channel_id,
+                ids,
+                posted,
+                channel_id,
+                ids,
+                posted,
+                [msg.get("text") for msg in batch],
+                [Json(msg) for msg in batch],
+                [msg.get("views") for msg in batch],
+                [msg.get("forwards") for msg in batch],
+                [msg.get("replies") for msg in batch],
+                [msg.get("reactions") for msg in batch],
+                settings.ai_summary_workers > 0 and provider_configured(),
+                settings.summary_min_chars,
+                channel_id,
+            ),
+        )
+        row = await cur.fetchone()
+        return int(row[0]) if row else 0
+
+
+async def _fetch_new_posts(conn: Any, channel_id: int, tg_ref: str | int, tg_id: int, peer: dict) -> dict:
+    """History mode: page back from the newest message to the channel's history watermark.
+
+    Posts above the watermark that live updates already stored are read again
+    (the upsert is idempotent), so a gap left by a dropped connection is filled
+    even when newer posts arrived after it. Once the pages are stored, the
+    watermark moves up to the newest message seen.
+    """
+    async with conn.cursor() as cur:
+        await cur.execute("select history_watermark from channels where id=%s", (channel_id,))
+        row = await cur.fetchone()
+        watermark = row[0] if row else None
+
+    cutoff = posts_retention_cutoff()
+    newest: Optional[int] = None
+    batch: list[dict] = []
+    batches: list[int] = []
+    # A first fetch takes the latest 1000 messages; later ones read everything past the watermark
+    async for msg in fetch_history(tg_ref, limit=None if watermark else 1000, tg_id=tg_id, min_id=watermark or 0, **peer):
+        newest = newest or msg["id"]
+        # Everything further back is past retention (archived months)
+        if cutoff is not None and _posted_at(msg) < cutoff:
+            break
+        batch.append(msg)
+        if len(batch) >= settings.fetch_batch_size:
+            batches.append(await upsert_posts_batch(conn, channel_id, batch))
+            batch = []
+    if batch:
+        batches.append(await upsert_posts_batch(conn, channel_id, batch))
+    async with conn.cursor() as cur:
+        await cur.execute(
+            "update channels set history_watermark=greatest(history_watermark, %s), history_synced_at=now() where id=%s",
+            (newest, channel_id),
+        )
+    return {"inserted": sum(batches), "batches": batches}
+
+
+async def _refresh_post_metrics(conn: Any, channel_id: int, tg_ref: str | int, tg_id: int, peer: dict) -> dict:
+    """Metrics mode: re-read counters of posts whose refresh is due, by message id.
+
+    How often a post is due depends on its age (see ``metrics_refresh_interval``
+    in schema.sql). Only the metric columns and ``metrics_refreshed_at`` are written.
+    """
+    async with conn.cursor() as cur:
+        await cur.execute(
+            """
+            select tg_message_id from posts
+            where channel_id=%s
+              and posted_at > now() - make_interval(days => %s)
+              and coalesce(metrics_refreshed_at, '-infinity') < now() - metrics_refresh_interval(now() - posted_at)
+            order by metrics_refreshed_at asc nulls first
+            limit %s
+            """,
+            (channel_id, settings.metrics_refresh_max_age_days, settings.metrics_refresh_limit),
+        )
+        ids = [r[0] for r in await cur.fetchall()]
+    if not ids:
+        return {"requested": 0, "refreshed": 0}
+
+    found = {m["id"]: m for m in await fetch_message_metrics(tg_ref, ids, tg_id=tg_id, **peer)}
+    # Ids that came back empty (deleted messages) are only stamped so they are not re-polled
+    metrics = [found.get(i, {}) for i in ids]
+    async with conn.cursor() as cur:
+        await cur.execute(
+            """
+            update posts p set
+              views = case when m.found then m.views else p.views end,
+              forwards = case when m.found then m.forwards else p.forwards end,
+              replies = case when m.found then m.replies else p.replies end,
+              reactions = case when m.found then m.reactions else p.reactions end,
+              metrics_refreshed_at = now()
+            from unnest(%s::bigint[], %s::bool[], %s::int[], %s::int[], %s::int[], %s::int[])
+              as m(tg_message_id, found, views, forwards, replies, reactions)
+            where p.channel_id=%s and p.tg_message_id=m.tg_message_id
+              -- same window as the selection above, so only recent partitions are scanned
+              and p.posted_at > now() - make_interval(days => %s)
+            """,
+            (
+                ids,
+                [bool(m) for m in metrics],
+                [m.get("views") for m in metrics],
+                [m.get("forwards") for m in metrics],
+                [m.get("replies") for m in metrics],
+                [m.get("reactions") for m in metrics],
+                channel_id,
+                settings.metrics_refresh_max_age_days,
+            ),
+        )
+    return {"requested": len(ids), "refreshed": len(found)}
 
 
 async def process_fetch_job(job_id: int) -> None:
     pool = require_pool()
     async with pool.connection() as conn:
         async with conn.cursor() as cur:
-            await cur.execute("select id, channel_id from fetch_jobs where id=%s", (job_id,))
+            await cur.execute("select id, channel_id, kind from fetch_jobs where id=%s", (job_id,))
             job = await cur.fetchone()
         if not job:
             return
         async with conn.cursor() as cur:
-            await cur.execute("select id, tg_id, tg_url, status from channels where id=%s", (job[1],))
+            await cur.execute("select id, tg_id, tg_url, status, tg_access_hash, tg_access_hash_account from channels where id=%s", (job[1],))
             channel = await cur.fetchone()
         if not channel:
             return
+        is_history = job[2] != "metrics"
+        # The URL also picks the channel's account; it is only resolved when no valid access_hash is known
+        tg_ref = channel[2] if channel[2] else channel[1]
+        kind = job[2]
+        job_started = time.perf_counter()
         try:
-            async with conn.cursor() as cur:
-                await cur.execute("update fetch_jobs set status='running', started_at=now() where id=%s", (job_id,))
-
             # Resolve channel tg_id if missing
             tg_id = channel[1]
+            peer = {"access_hash": channel[4], "access_hash_account": channel[5]}
             title = None
             if tg_id is None:
                 resolved = await resolve_channel(channel[2])
                 tg_id = resolved.tg_id
                 title = resolved.title
+                peer = {"access_hash": resolved.access_hash, "access_hash_account": resolved.account}
                 async with conn.cursor() as cur:
                     await cur.execute(
-                        "update channels set tg_id=%s, title=coalesce(%s, title), status='active' where id=%s",
-                        (tg_id, title, channel[0]),
+                        "update channels set tg_id=%s, tg_access_hash=%s, tg_access_hash_account=%s, title=coalesce(%s, title), status='active' where id=%s",
+                        (tg_id, resolved.access_hash, resolved.account, title, channel[0]),
                     )
+                response_cache.invalidate("channels", channel_tag(channel[0]))
 
-            # Find last message id to continue from
-            async with conn.cursor() as cur:
-                await cur.execute("select max(tg_message_id) from posts where channel_id=%s", (channel[0],))
-                row = await cur.fetchone()
-                last_msg_id = row[0] if row else None
-
-            inserted = 0
-            fetched = 0
             started_ts = time.time()
-            # Prefer using the URL/username to avoid access hash issues
-            tg_ref = channel[2] if channel[2] else tg_id
-            # Always refresh a recent window (e.g., 200 msgs) to backfill engagement metrics
-            refresh_window = 200
-            processed = 0
-            async for msg in fetch_history(tg_ref, limit=1000):
-                processed += 1
-                if last_msg_id and msg["id"] <= last_msg_id and processed > refresh_window:
-                    break
-                async with conn.cursor() as cur:
-                    await cur.execute(
-                        """
-                        insert into posts (channel_id, tg_message_id, posted_at, text, raw)
-                        values (%s, %s, %s, %s, %s)
-                        on conflict (channel_id, tg_message_id) do update
-                          set raw = coalesce(posts.raw, '{}'::jsonb) || excluded.raw
-                        """,
-                        (
-                            channel[0],
-                            msg["id"],
-                            datetime.fromisoformat(msg["date"]) if msg["date"] else None,
-                            msg.get("text"),
-                            Json(msg),
-                        ),
-                    )
-                inserted += 1
-                fetched += 1
-                if fetched % 50 == 0:
-                    await asyncio.sleep(0.5)
+            if is_history:
+                stats = await _fetch_new_posts(conn, channel[0], tg_ref, tg_id, peer)
+            else:
+                stats = await _refresh_post_metrics(conn, channel[0], tg_ref, tg_id, peer)
+            stats["duration_s"] = round(time.time() - started_ts, 3)
+            if stats.get("inserted") or stats.get("refreshed"):
+                response_cache.invalidate(channel_tag(channel[0]))
 
             async with conn.cursor() as cur:
                 await cur.execute(
-                    "update fetch_jobs set status='success', finished_at=now(), stats=jsonb_build_object('inserted', %s, 'duration_s', %s) where id=%s",
-                    (inserted, round(time.time() - started_ts, 3), job_id),
+                    "update fetch_jobs set status='success', finished_at=now(), stats=%s where id=%s",
+                    (Json(stats), job_id),
                 )
-        except FloodWaitError as exc:
-            logger.warning("Fetch job hit flood wait", extra={"job_id": job_id, "seconds": exc.seconds})
+            # Persist the owner account's (re-)resolved access_hash so other processes skip resolution too
+            fresh = known_peer(tg_ref, tg_id)
+            if fresh is not None and fresh != (peer["access_hash_account"], peer["access_hash"]):
+                async with conn.cursor() as cur:
+                    await cur.execute(
+                        "update channels set tg_access_hash_account=%s, tg_access_hash=%s where id=%s",
+                        (fresh[0], fresh[1], channel[0]),
+                    )
+            if is_history:
+                await reschedule_channel(conn, channel[0])
+            observe_fetch_job(kind, "success", time.perf_counter() - job_started, stats.get("inserted") if is_history else stats.get("refreshed"))
+        except (FloodWaitError, RateLimited) as exc:
+            observe_fetch_job(kind, "flood_wait", time.perf_counter() - job_started)
+            # Not a failure: put the job back until the wait expires, or right away
+            # when a failover account for this channel is still free
+            delay = min(exc.seconds, retry_delay(tg_ref))
+            logger.warning("Fetch job hit flood wait, re-queued", extra={"job_id": job_id, "seconds": exc.seconds, "retry_in": delay})
             async with conn.cursor() as cur:
                 await cur.execute(
-                    "update fetch_jobs set status='error', finished_at=now(), error=%s where id=%s",
-                    (f'FLOOD_WAIT {exc.seconds}s', job_id),
+                    "update fetch_jobs set status='queued', started_at=null, not_before=now() + make_interval(secs => %s), error=%s where id=%s",
+                    (delay, f'FLOOD_WAIT {exc.seconds}s', job_id),
                 )
         except ChannelPrivateError as exc:
+            observe_fetch_job(kind, "error", time.perf_counter() - job_started)
             logger.warning("Channel is private", extra={"job_id": job_id, "error": str(exc)})
             async with conn.cursor() as cur:
                 await cur.execute(
                     "update fetch_jobs set status='error', finished_at=now(), error=%s where id=%s",
                     (str(exc), job_id),
                 )
+            if is_history:
+                await _defer_channel(conn, channel[0])
         except Exception as exc:  # noqa: BLE001
+            observe_fetch_job(kind, "error", time.perf_counter() - job_started)
             logger.exception("Unexpected error during fetch job", extra={"job_id": job_id})
             async with conn.cursor() as cur:
                 await cur.execute(
                     "update fetch_jobs set status='error', finished_at=now(), error=%s where id=%s",
                     (str(exc), job_id),
                 )
+            if is_history:
+                await _defer_channel(conn, channel[0])
 
 
 def get_scheduler() -> AsyncIOScheduler:
@@ -140,39 +379,122 @@ def get_scheduler() -> AsyncIOScheduler:
 
 def schedule_periodic_fetch() -> None:
     sch = get_scheduler()
-    sch.add_job(run_periodic_fetch_cycle, "interval", minutes=settings.cron_fetch_minutes, id="periodic_fetch", replace_existing=True)
+    sch.add_job(run_periodic_fetch_cycle, "interval", seconds=settings.fetch_scheduler_tick_seconds, id="periodic_fetch", replace_existing=True)
+    sch.add_job(run_metrics_refresh_cycle, "interval", seconds=settings.fetch_scheduler_tick_seconds, id="metrics_refresh", replace_existing=True)
 
 
 async def run_periodic_fetch_cycle() -> None:
+    """Enqueue jobs for active channels whose next_fetch_at has passed.
+
+    Channels currently fed by live updates (valid ``live_until`` lease) are only
+    polled once every FETCH_MAX_INTERVAL_MINUTES, to pick up updates Telegram
+    did not deliver.
+    """
     pool = require_pool()
     async with pool.connection() as conn:
         async with conn.cursor() as cur:
-            await cur.execute("select id from channels where status='active'")
-            rows = await cur.fetchall()
-            for row in rows:
-                await cur.execute(
-                    "insert into fetch_jobs (channel_id, status) values (%s, 'queued')",
-                    (row[0],),
-                )
+            await cur.execute(
+                """
+                insert into fetch_jobs (channel_id, status)
+                select c.id, 'queued' from channels c
+                where c.status='active'
+                  and (c.next_fetch_at is null or c.next_fetch_at <= now())
+                  and (c.live_until is null or c.live_until < now()
+                       or c.history_synced_at is null or c.history_synced_at < now() - make_interval(mins => %s))
+                  and not exists (
+                    select 1 from fetch_jobs j
+                    where j.channel_id=c.id and j.kind='history' and j.status in ('queued','running')
+                  )
+                on conflict (channel_id, kind) where status in ('queued','running') do nothing
+                """,
+                (settings.fetch_max_interval_minutes,),
+            )
 
 
-async def process_queued_jobs(batch_limit: int = 3) -> None:
-    try:
-        pool = require_pool()
-        async with pool.connection() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute(
-                    "select id from fetch_jobs where status='queued' order by started_at nulls first, id asc limit %s",
-                    (batch_limit,),
+async def run_metrics_refresh_cycle() -> None:
+    """Enqueue metrics jobs for active channels that have posts due for a refresh."""
+    pool = require_pool()
+    async with pool.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                insert into fetch_jobs (channel_id, status, kind)
+                select c.id, 'queued', 'metrics' from channels c
+                where c.status='active'
+                  and not exists (
+                    select 1 from fetch_jobs j
+                    where j.channel_id=c.id and j.kind='metrics' and j.status in ('queued','running')
+                  )
+                  and exists (
+                    select 1 from posts p
+                    where p.channel_id=c.id
+                      and p.posted_at > now() - make_interval(days => %s)
+                      and coalesce(p.metrics_refreshed_at, '-infinity') < now() - metrics_refresh_interval(now() - p.posted_at)
+                  )
+                on conflict (channel_id, kind) where status in ('queued','running') do nothing
+                """,
+                (settings.metrics_refresh_max_age_days,),
+            )
+
+
+async def claim_fetch_job() -> Optional[int]:
+    """Atomically claim the next queued job and mark it running.
+
+    ``for update skip locked`` lets concurrent workers (in this process or in
+    other replicas) each take a different job. Jobs left ``running`` for longer
+    than ``FETCH_JOB_TIMEOUT_MINUTES`` are treated as abandoned and reclaimed;
+    jobs deferred by a flood wait are skipped until ``not_before``.
+    """
+    pool = require_pool()
+    async with pool.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                update fetch_jobs set status='running', started_at=now(), finished_at=null, error=null
+                where id = (
+                  select id from fetch_jobs
+                  where (status='queued' and (not_before is null or not_before <= now()))
+                     or (status='running' and started_at < now() - make_interval(mins => %s))
+                  order by id asc
+                  limit 1
+                  for update skip locked
                 )
-                jobs = await cur.fetchall()
-        for job in jobs:
-            await process_fetch_job(job[0])
-    except Exception as e:
-        logger.warning(f"Could not process queued jobs: {e}")
+                returning id
+                """,
+                (settings.fetch_job_timeout_minutes,),
+            )
+            row = await cur.fetchone()
+    return row[0] if row else None
 
 
-def schedule_job_processor() -> None:
-    sch = get_scheduler()
-    sch.add_job(process_queued_jobs, "interval", seconds=15, id="job_processor", replace_existing=True)
+async def _fetch_worker(worker_no: int) -> None:
+    while True:
+        try:
+            job_id = await claim_fetch_job()
+        except Exception as e:  # noqa: BLE001
+            logger.warning(f"Fetch worker {worker_no} could not claim a job: {e}")
+            job_id = None
+        if job_id is None:
+            await asyncio.sleep(settings.fetch_poll_seconds)
+            continue
+        try:
+            await process_fetch_job(job_id)
+        except Exception:  # noqa: BLE001
+            # Pool timeouts and dropped connections escape the job's own error handling; keep the worker alive
+            logger.exception(f"Fetch worker {worker_no} failed on job {job_id}")
+            await asyncio.sleep(settings.fetch_poll_seconds)
+
+
+def start_fetch_workers() -> None:
+    """Start ``FETCH_WORKERS`` tasks that drain the fetch job queue continuously."""
+    if _worker_tasks:
+        return
+    for n in range(settings.fetch_workers):
+        _worker_tasks.append(asyncio.create_task(_fetch_worker(n), name=f"fetch-worker-{n}"))
+
 
+async def stop_fetch_workers() -> None:
+    for task in _worker_tasks:
+        task.cancel()
+    await asyncio.gather(*_worker_tasks, return_exceptions=True)
+    _worker_tasks.clear()
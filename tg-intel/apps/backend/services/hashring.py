@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from bisect import bisect
+import hashlib
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hash ring with virtual nodes.
+
+    Adding or removing a node only moves the keys that hashed next to it, so
+    channel -> account assignments stay stable as the account pool changes.
+    """
+
+    def __init__(self, nodes: list[str], replicas: int = 100) -> None:
+        self.nodes = list(dict.fromkeys(nodes))
+        points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(replicas))
+        self._hashes = [p[0] for p in points]
+        self._owners = [p[1] for p in points]
+
+    def preference(self, key: str) -> list[str]:
+        """Return all nodes ordered by preference for ``key``: owner first, then failovers."""
+        if not self._hashes:
+            return []
+        start = bisect(self._hashes, _hash(key))
+        out: list[str] = []
+        for i in range(len(self._owners)):
+            node = self._owners[(start + i) % len(self._owners)]
+            if node not in out:
+                out.append(node)
+                if len(out) == len(self.nodes):
+                    break
+        return out
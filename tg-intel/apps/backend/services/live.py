@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from typing import Any, Optional
+import asyncio
+import time
+
+from telethon import events
+
+from apps.backend.core.cache import channel_tag, response_cache
+from apps.backend.core.config import settings
+from apps.backend.core.db import require_pool
+from apps.backend.core.logger import logger
+from apps.backend.services.fetcher import enqueue_fetch_job, upsert_posts_batch
+from apps.backend.services.telegram import get_accounts, joined_channel_ids, message_to_dict, start_client
+
+
+# tg_id -> channels.id for active channels the account receives updates for
+_tracked: dict[int, int] = {}
+_tracked_synced_at = 0.0
+_watchdog_task: Optional[asyncio.Task] = None
+# Re-read the tracked set this often so newly added channels go live
+_TRACKED_SYNC_SECONDS = 600
+
+
+async def _on_message(event: Any) -> None:
+    tg_id = getattr(event.message.peer_id, "channel_id", None)
+    channel_id = _tracked.get(tg_id) if tg_id is not None else None
+    if channel_id is None:
+        return
+    try:
+        pool = require_pool()
+        async with pool.connection() as conn:
+            await upsert_posts_batch(conn, channel_id, [message_to_dict(event.message)])
+        response_cache.invalidate(channel_tag(channel_id))
+    except Exception:  # noqa: BLE001
+        logger.exception("Failed to ingest live update", extra={"channel_id": channel_id, "tg_message_id": event.message.id})
+
+
+async def _sync_tracked() -> None:
+    global _tracked, _tracked_synced_at
+    joined: set[int] = set()
+    for account in get_accounts():
+        joined |= await joined_channel_ids(account)
+    pool = require_pool()
+    async with pool.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("select tg_id, id from channels where status='active' and tg_id is not null")
+            rows = await cur.fetchall()
+    _tracked = {int(r[0]): int(r[1]) for r in rows if int(r[0]) in joined}
+    _tracked_synced_at = time.monotonic()
+    logger.info(f"Live updates tracking {len(_tracked)} of {len(rows)} active channels")
+
+
+async def _fill_gaps() -> None:
+    # Updates may have been missed while disconnected; one history job per channel pages back to its watermark
+    pool = require_pool()
+    async with pool.connection() as conn:
+        for channel_id in _tracked.values():
+            await enqueue_fetch_job(conn, channel_id)
+
+
+async def _renew_lease() -> None:
+    pool = require_pool()
+    async with pool.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "update channels set live_until=now() + make_interval(secs => %s) where id = any(%s)",
+                (settings.tg_live_lease_seconds, list(_tracked.values())),
+            )
+
+
+async def _watchdog() -> None:
+    """Keep the clients connected and the live lease of tracked channels fresh.
+
+    While a channel's ``live_until`` lease is valid the periodic scheduler only
+    polls it at the slowest interval, catching updates Telegram never pushed.
+    If a client drops, the lease lapses and polling resumes; after reconnecting,
+    the client replays missed updates and a history job per tracked channel
+    pages back to the channel's history watermark, which live posts never move.
+    """
+    connected = True
+    while True:
+        try:
+            if not all(a.client.is_connected() for a in get_accounts()):
+                connected = False
+                await start_client()
+            if not connected:
+                connected = True
+                await _sync_tracked()
+                await _fill_gaps()
+            elif time.monotonic() - _tracked_synced_at > _TRACKED_SYNC_SECONDS:
+                await _sync_tracked()
+            await _renew_lease()
+        except Exception as e:  # noqa: BLE001
+            connected = False
+            logger.warning(f"Live updates watchdog: {e}")
+        await asyncio.sleep(settings.tg_live_lease_seconds / 3)
+
+
+async def start_live_ingestion() -> None:
+    """Subscribe to new and edited channel messages on every account's client."""
+    global _watchdog_task
+    if _watchdog_task is not None:
+        return
+    await start_client()
+    for account in get_accounts():
+        account.client.add_event_handler(_on_message, events.NewMessage(func=lambda e: e.is_channel))
+        account.client.add_event_handler(_on_message, events.MessageEdited(func=lambda e: e.is_channel))
+    await _sync_tracked()
+    await _fill_gaps()
+    _watchdog_task = asyncio.create_task(_watchdog(), name="live-watchdog")
+
+
+async def stop_live_ingestion() -> None:
+    global _watchdog_task
+    if _watchdog_task is None:
+        return
+    _watchdog_task.cancel()
+    await asyncio.gather(_watchdog_task, return_exceptions=True)
+    _watchdog_task = None
+    for account in get_accounts():
+        account.client.remove_event_handler(_on_message)
+    # Hand tracked channels back to the poller right away
+    pool = require_pool()
+    async with pool.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("update channels set live_until=null where id = any(%s)", (list(_tracked.values()),))
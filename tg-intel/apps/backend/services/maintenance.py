@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from apps.backend.core.config import settings
+from apps.backend.core.db import require_pool
+from apps.backend.core.logger import logger
+from apps.backend.services.archive import archive_partition
+from apps.backend.services.export import parquet_available
+from apps.backend.services.fetcher import get_scheduler
+from apps.backend.services.partitions import month_of, monthly_partitions, months_before, posts_retention_cutoff
+
+
+async def run_partition_maintenance() -> None:
+    """Create upcoming monthly partitions, archive posts and drop engagement history past retention."""
+    pool = require_pool()
+    async with pool.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("select ensure_monthly_partitions('posts')")
+            await cur.execute("select ensure_monthly_partitions('post_metric_snapshots')")
+
+        cutoff = posts_retention_cutoff()
+        if cutoff is not None:
+            if not parquet_available():
+                logger.warning("POSTS_RETENTION_MONTHS is set but pyarrow is not installed; nothing is archived")
+            else:
+                for name, month in await monthly_partitions(conn, "posts"):
+                    if month >= cutoff.date():
+                        break
+                    try:
+                        await archive_partition(conn, name, month)
+                    except Exception as e:  # noqa: BLE001
+                        logger.warning(f"Could not archive {name}, retrying on the next run: {e}")
+                        break
+
+        if settings.snapshot_retention_months > 0:
+            cutoff_month = months_before(month_of(datetime.now(timezone.utc)), settings.snapshot_retention_months)
+            for name, month in await monthly_partitions(conn, "post_metric_snapshots"):
+                if month >= cutoff_month:
+                    break
+                async with conn.cursor() as cur:
+                    await cur.execute(f'drop table if exists "{name}"')
+                logger.info(f"Dropped engagement history partition {name}")
+
+
+def schedule_maintenance() -> None:
+    sch = get_scheduler()
+    sch.add_job(run_partition_maintenance, "interval", hours=24, id="partition_maintenance", replace_existing=True, next_run_time=datetime.now(timezone.utc))
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timezone
+from typing import Any, Iterable, Optional
+import re
+
+from apps.backend.core.config import settings
+
+
+_PARTITION_NAME = re.compile(r"_y(\d{4})m(\d{2})$")
+
+# Months known to have a posts partition in this process, so ingestion asks the database only once per month
+_post_months: set[date] = set()
+
+
+def month_of(ts: datetime) -> date:
+    """UTC month (first day) a timestamp falls into, as partitions are bounded in UTC."""
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc)
+    return date(ts.year, ts.month, 1)
+
+
+def months_before(month: date, n: int) -> date:
+    index = month.year * 12 + month.month - 1 - n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def posts_retention_cutoff() -> Optional[datetime]:
+    """Start of the oldest month kept in ``posts`` (``POSTS_RETENTION_MONTHS``), or None to keep everything.
+
+    Older months are archived to Parquet by the maintenance job and are not ingested again.
+    """
+    if settings.posts_retention_months <= 0:
+        return None
+    cutoff = months_before(month_of(datetime.now(timezone.utc)), settings.posts_retention_months)
+    return datetime(cutoff.year, cutoff.month, 1, tzinfo=timezone.utc)
+
+
+async def monthly_partitions(conn: Any, parent: str) -> list[tuple[str, date]]:
+    """Monthly partitions of ``parent`` (named ``<parent>_yYYYYmMM``) with the month each covers, oldest first."""
+    async with conn.cursor() as cur:
+        await cur.execute(
+            """
+            select c.relname from pg_inherits i
+            join pg_class c on c.oid = i.inhrelid
+            where i.inhparent = %s::regclass
+            """,
+            (parent,),
+        )
+        rows = await cur.fetchall()
+    out = []
+    for (name,) in rows:
+        m = _PARTITION_NAME.search(name)
+        if m:
+            out.append((name, date(int(m.group(1)), int(m.group(2)), 1)))
+    return sorted(out, key=lambda p: p[1])
+
+
+async def ensure_post_partitions(conn: Any, timestamps: Iterable[datetime]) -> None:
+    """Create the ``posts`` partitions for these posting times before they are inserted.
+
+    History backfills reach months before the ones the maintenance job keeps
+    ready; each month costs one call per process.
+    """
+    missing = {month_of(ts) for ts in timestamps} - _post_months
+    if not missing:
+        return
+    async with conn.cursor() as cur:
+        for month in sorted(missing):
+            await cur.execute("select create_monthly_partition('posts', %s)", (datetime(month.year, month.month, 1, tzinfo=timezone.utc),))
+    _post_months.update(missing)
+
+
+def forget_post_partition(month: date) -> None:
+    _post_months.discard(month)
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+
+class RateLimited(RuntimeError):
+    """Raised instead of waiting when the governor is blocked for too long."""
+
+    def __init__(self, seconds: int) -> None:
+        super().__init__(f"Rate limited for {seconds}s")
+        self.seconds = seconds
+
+
+class RateGovernor:
+    """Shared token bucket for Telegram API calls that adapts to flood waits.
+
+    Every call takes a token before it is sent. A flood wait blocks the whole
+    bucket until it expires and halves the refill rate; each successful call
+    then recovers the rate additively towards the configured maximum (AIMD).
+    """
+
+    def __init__(self, rate: float, burst: int, min_rate: float = 0.05, max_wait: float = 30) -> None:
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.max_wait = max_wait
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def blocked_for(self) -> float:
+        return max(0.0, self._blocked_until - time.monotonic())
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self._updated)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = max(self._updated, now)
+
+    async def acquire(self) -> None:
+        """Wait for a token; raise RateLimited if a flood wait outlasts ``max_wait``."""
+        async with self._lock:
+            while True:
+                blocked = self.blocked_for()
+                if blocked > self.max_wait:
+                    raise RateLimited(int(blocked) + 1)
+                if blocked > 0:
+                    await asyncio.sleep(blocked)
+                    continue
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def on_success(self) -> None:
+        self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+    def on_flood_wait(self, seconds: int) -> None:
+        now = time.monotonic()
+        self._blocked_until = max(self._blocked_until, now + seconds)
+        self.rate = max(self.min_rate, self.rate / 2)
+        # Nothing accrues while blocked
+        self._tokens = 0.0
+        self._updated = self._blocked_until
@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+from typing import Any, AsyncIterator, Optional
+import asyncio
+import hashlib
+import unicodedata
+
+from apps.backend.core.config import settings
+from apps.backend.core.db import require_pool
+from apps.backend.core.logger import logger
+from apps.backend.services.ai import SummaryResult, provider_configured, summarize, summarize_stream
+
+
+_worker_tasks: list[asyncio.Task] = []
+# One provider call per (content hash, model) at a time in this process; callers share its task
+_inflight: dict[tuple[str, str], asyncio.Task] = {}
+
+# Failed jobs are retried with exponential backoff, then left in 'error'
+_MAX_ATTEMPTS = 3
+# Jobs left 'running' longer than this (crashed worker) are reclaimed
+_JOB_TIMEOUT_MINUTES = 10
+_POLL_SECONDS = 5
+
+# Leases on a (content hash, model) outlive a crashed replica's provider call by at most this long
+_LEASE_MINUTES = 10
+# Callers that lose the lease poll for the stored summary, backing off up to the cap
+_LEASE_POLL_SECONDS = 0.25
+_LEASE_POLL_MAX_SECONDS = 5.0
+
+
+def needs_model_summary(text: Optional[str]) -> bool:
+    return text is not None and len(text) > settings.summary_min_chars
+
+
+def content_hash(text: str) -> str:
+    """Hash of the text up to Unicode form, case and whitespace, so reposts share a summary."""
+    normalized = " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def effective_model(model_id: Optional[str]) -> str:
+    return model_id or settings.ai_summary_model_id or ""
+
+
+async def _link_post(conn: Any, post_id: int, summary_id: int) -> None:
+    async with conn.cursor() as cur:
+        await cur.execute(
+            "update posts set summary_id=%s where id=%s and summary_id is distinct from %s",
+            (summary_id, post_id, summary_id),
+        )
+
+
+async def cached_summary(conn: Any, post_id: int, text: str, model_id: Optional[str] = None) -> Optional[str]:
+    """Find an existing summary for this text and model without calling the provider.
+
+    A hit produced for another post (a repost or forward) is linked to this
+    post on the way out.
+    """
+    async with conn.cursor() as cur:
+        await cur.execute(
+            """
+            select id, summary from summaries
+            where (content_hash=%s and model_id=%s) or (post_id=%s and content_hash is null)
+            order by content_hash nulls last
+            limit 1
+            """,
+            (content_hash(text), effective_model(model_id), post_id),
+        )
+        row = await cur.fetchone()
+    if row is None:
+        return None
+    await _link_post(conn, post_id, row[0])
+    return row[1]
+
+
+async def store_summary(conn: Any, post_id: int, text: str, model_id: str, result: SummaryResult) -> None:
+    """Persist ``result`` as the shared summary of ``text`` and link the post to it.
+
+    Any queued background job for the post is completed as well, so a summary
+    produced on demand is not requested twice.
+    """
+    async with conn.cursor() as cur:
+        await cur.execute(
+            """
+            insert into summaries (post_id, content_hash, model_id, summary, tokens) values (%s, %s, %s, %s, %s)
+            on conflict (content_hash, model_id) do update set summary=excluded.summary, tokens=excluded.tokens
+            returning id
+            """,
+            (post_id, content_hash(text), model_id, result.summary, result.tokens),
+        )
+        summary_id = (await cur.fetchone())[0]
+        await cur.execute(
+            "update summary_jobs set status='done', finished_at=now(), error=null where post_id=%s and status<>'done'",
+            (post_id,),
+        )
+    await _link_post(conn, post_id, summary_id)
+
+
+async def _claim_lease(conn: Any, key: tuple[str, str]) -> bool:
+    """Take the replica-wide lease on producing ``key``; a lease past its expiry is taken over."""
+    async with conn.cursor() as cur:
+        await cur.execute(
+            """
+            insert into summary_leases (content_hash, model_id, expires_at)
+            values (%s, %s, now() + make_interval(mins => %s))
+            on conflict (content_hash, model_id) do update set expires_at = excluded.expires_at
+              where summary_leases.expires_at < now()
+            returning 1
+            """,
+            (*key, _LEASE_MINUTES),
+        )
+        return await cur.fetchone() is not None
+
+
+async def _release_lease(conn: Any, key: tuple[str, str]) -> None:
+    async with conn.cursor() as cur:
+        await cur.execute("delete from summary_leases where content_hash=%s and model_id=%s", key)
+
+
+async def _produce_summary(
+    key: tuple[str, str],
+    post_id: int,
+    text: str,
+    model_id: str,
+    pieces: Optional[asyncio.Queue] = None,
+) -> str:
+    """Summarize and store under the replica-wide lease; streams pieces to ``pieces`` when given.
+
+    Pool connections are only taken for the short lease, lookup and store
+    statements, never across the provider call. A caller that loses the lease
+    polls for the winner's row with backoff and takes the lease over if it is
+    released or expires without one. ``pieces`` always receives a closing ``None``.
+    """
+    pool = require_pool()
+    delay = _LEASE_POLL_SECONDS
+    try:
+        while True:
+            async with pool.connection() as conn:
+                claimed = await _claim_lease(conn, key)
+                # Checked after claiming: a previous holder stores its row before releasing
+                cached = await cached_summary(conn, post_id, text, model_id)
+                if cached is not None:
+                    if claimed:
+                        await _release_lease(conn, key)
+                    return cached
+            if claimed:
+                break
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _LEASE_POLL_MAX_SECONDS)
+
+        try:
+            if pieces is None:
+                result = await summarize(text, model_id=model_id or None)
+            else:
+                result = SummaryResult()
+                async for piece in summarize_stream(text, model_id=model_id or None, result=result):
+                    pieces.put_nowait(piece)
+            async with pool.connection() as conn:
+                await store_summary(conn, post_id, text, model_id, result)
+        finally:
+            async with pool.connection() as conn:
+                await _release_lease(conn, key)
+        return result.summary
+    finally:
+        if pieces is not None:
+            pieces.put_nowait(None)
+
+
+def _forget_inflight(key: tuple[str, str], task: asyncio.Task) -> None:
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if not task.cancelled():
+        task.exception()  # retrieved here even when every waiter has gone away
+
+
+async def get_or_create_summary(post_id: int, text: str, model_id: Optional[str] = None) -> tuple[str, bool]:
+    """Return ``(summary, cached)`` for a long post, calling the provider at most once per text.
+
+    Concurrent callers for the same text and model, in this process or in
+    other replicas, wait on a single provider call and share its result;
+    ``cached`` is False only for the caller whose request produced it.
+    """
+    model_id = effective_model(model_id)
+    pool = require_pool()
+    async with pool.connection() as conn:
+        cached = await cached_summary(conn, post_id, text, model_id)
+    if cached is not None:
+        return cached, True
+
+    key = (content_hash(text), model_id)
+    task = _inflight.get(key)
+    if task is not None:
+        summary = await asyncio.shield(task)
+        async with pool.connection() as conn:
+            await cached_summary(conn, post_id, text, model_id)  # links this post to the shared row
+        return summary, True
+
+    return await asyncio.shield(_start_inflight(key, post_id, text, model_id)), False
+
+
+def _start_inflight(
+    key: tuple[str, str],
+    post_id: int,
+    text: str,
+    model_id: str,
+    pieces: Optional[asyncio.Queue] = None,
+) -> asyncio.Task:
+    # Runs detached from the request, so a disconnecting leader does not fail the waiters
+    task = asyncio.create_task(_produce_summary(key, post_id, text, model_id, pieces), name=f"summarize-{key[0][:12]}")
+    _inflight[key] = task
+    task.add_done_callback(lambda t: _forget_inflight(key, t))
+    return task
+
+
+async def stream_summary(post_id: int, text: str, model_id: Optional[str] = None) -> AsyncIterator[dict]:
+    """Streaming variant of ``get_or_create_summary``.
+
+    Yields ``{"event": "token", "text": ...}`` for each provider piece, then
+    ``{"event": "done", "summary": ..., "cached": ...}``. Stored summaries and
+    calls already in flight for the same text go straight to ``done``; so do
+    calls leased by another replica, once its summary is stored. Pieces are
+    relayed without holding a pool connection. The provider call outlives a
+    disconnected client and is still persisted.
+    """
+    model_id = effective_model(model_id)
+    pool = require_pool()
+    async with pool.connection() as conn:
+        cached = await cached_summary(conn, post_id, text, model_id)
+    if cached is not None:
+        yield {"event": "done", "summary": cached, "cached": True}
+        return
+
+    key = (content_hash(text), model_id)
+    task = _inflight.get(key)
+    if task is not None:
+        summary = await asyncio.shield(task)
+        async with pool.connection() as conn:
+            await cached_summary(conn, post_id, text, model_id)
+        yield {"event": "done", "summary": summary, "cached": True}
+        return
+
+    pieces: asyncio.Queue = asyncio.Queue()
+    task = _start_inflight(key, post_id, text, model_id, pieces)
+    streamed = False
+    while (piece := await pieces.get()) is not None:
+        streamed = True
+        yield {"event": "token", "text": piece}
+    summary = await asyncio.shield(task)
+    yield {"event": "done", "summary": summary, "cached": not streamed}
+
+
+async def claim_summary_job() -> Optional[tuple[int, int]]:
+    """Claim the next queued summary job (``for update skip locked``); returns (job id, post id)."""
+    pool = require_pool()
+    async with pool.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                update summary_jobs set status='running', started_at=now(), attempts=attempts + 1
+                where id = (
+                  select id from summary_jobs
+                  where (status='queued' and (not_before is null or not_before <= now()))
+                     or (status='running' and started_at < now() - make_interval(mins => %s))
+                  order by id asc
+                  limit 1
+                  for update skip locked
+                )
+                returning id, post_id
+                """,
+                (_JOB_TIMEOUT_MINUTES,),
+            )
+            row = await cur.fetchone()
+    return (row[0], row[1]) if row else None
+
+
+async def process_summary_job(job_id: int, post_id: int) -> None:
+    pool = require_pool()
+    try:
+        async with pool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("select text from posts where id=%s", (post_id,))
+                post = await cur.fetchone()
+        if post is not None and needs_model_summary(post[0]):
+            # Reposts of already summarized text are linked without a provider call
+            await get_or_create_summary(post_id, post[0])
+        async with pool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("update summary_jobs set status='done', finished_at=now(), error=null where id=%s", (job_id,))
+    except Exception as exc:  # noqa: BLE001
+        logger.warning(f"Summary job {job_id} for post {post_id} failed: {exc}")
+        async with pool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    """
+                    update summary_jobs
+                    set status = case when attempts >= %s then 'error' else 'queued' end,
+                        not_before = now() + make_interval(mins => power(2, attempts)::int),
+                        finished_at = case when attempts >= %s then now() end,
+                        error = %s
+                    where id = %s
+                    """,
+                    (_MAX_ATTEMPTS, _MAX_ATTEMPTS, str(exc), job_id),
+                )
+
+
+async def _summary_worker(worker_no: int) -> None:
+    while True:
+        try:
+            job = await claim_summary_job()
+        except Exception as e:  # noqa: BLE001
+            logger.warning(f"Summary worker {worker_no} could not claim a job: {e}")
+            job = None
+        if job is None:
+            await asyncio.sleep(_POLL_SECONDS)
+            continue
+        try:
+            await process_summary_job(*job)
+        except Exception:  # noqa: BLE001
+            # Its failure path writes to the database too; a job left 'running' is reclaimed after the timeout
+            logger.exception(f"Summary worker {worker_no} failed on job {job[0]}")
+            await asyncio.sleep(_POLL_SECONDS)
+
+
+def start_summary_workers() -> None:
+    """Start ``AI_SUMMARY_WORKERS`` tasks that pre-summarize long posts queued at ingest."""
+    if _worker_tasks or not provider_configured():
+        return
+    for n in range(settings.ai_summary_workers):
+        _worker_tasks.append(asyncio.create_task(_summary_worker(n), name=f"summary-worker-{n}"))
+
+
+async def stop_summary_workers() -> None:
+    for task in _worker_tasks:
+        task.cancel()
+    await asyncio.gather(*_worker_tasks, return_exceptions=True)
+    _worker_tasks.clear()
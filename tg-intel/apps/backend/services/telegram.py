@@ -1,89 +1,341 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Iterable, Optional
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Optional
+import time
 
 from telethon import TelegramClient
+from telethon.errors.rpcerrorlist import ChannelInvalidError, FloodWaitError, PeerIdInvalidError
+from telethon.tl.types import InputPeerChannel
 
 from apps.backend.core.config import settings
+from apps.backend.core.metrics import TELEGRAM_REQUEST_SECONDS, observe_flood_wait
+from apps.backend.services.hashring import HashRing
+from apps.backend.services.ratelimit import RateGovernor
 
 
-_client: Optional[TelegramClient] = None
+# Telethon fetches history in pages of this many messages
+_HISTORY_PAGE_SIZE = 100
 
 
-def get_client() -> TelegramClient:
-    global _client
-    if _client is None:
+@dataclass
+class Account:
+    """One Telegram account: its client, its own rate budget and peer cache.
+
+    Access hashes are specific to the account that resolved them, so each
+    account keeps its own LRU of channel tg_id -> access_hash.
+    """
+
+    name: str
+    client: TelegramClient
+    governor: RateGovernor
+    peers: "OrderedDict[int, int]" = field(default_factory=OrderedDict)
+
+
+_accounts: dict[str, Account] = {}
+_ring: Optional[HashRing] = None
+
+
+def account_name(session_path: str) -> str:
+    """Stable account name used for sharding: the session file name without suffix."""
+    return Path(session_path).stem
+
+
+def get_accounts() -> list[Account]:
+    global _ring
+    if not _accounts:
         if settings.tg_api_id is None or not settings.tg_api_hash:
             raise RuntimeError("TG_API_ID/TG_API_HASH are not configured")
-        _client = TelegramClient(settings.tg_session_path, settings.tg_api_id, settings.tg_api_hash)
-    return _client
+        names = [account_name(path) for path in settings.tg_session_paths]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            # Names are shard keys; two sessions under one name would silently drop an account
+            raise RuntimeError(
+                f"TG_SESSION_PATHS has several session files named {', '.join(duplicates)}; rename them apart"
+            )
+        for path, name in zip(settings.tg_session_paths, names):
+            # flood_sleep_threshold=0: surface every flood wait so the governor can react;
+            # catch_up replays updates missed while a live-updates client was disconnected
+            client = TelegramClient(
+                path, settings.tg_api_id, settings.tg_api_hash,
+                flood_sleep_threshold=0, catch_up=settings.tg_live_updates,
+            )
+            _accounts[name] = Account(
+                name=name,
+                client=client,
+                governor=RateGovernor(
+                    rate=settings.tg_rate_per_second,
+                    burst=settings.tg_rate_burst,
+                    max_wait=settings.tg_max_flood_wait_seconds,
+                ),
+            )
+        _ring = HashRing(list(_accounts))
+    return list(_accounts.values())
 
 
-async def start_client() -> None:
-    client = get_client()
-    if not client.is_connected():
-        await client.connect()
+def get_client() -> TelegramClient:
+    """Client of the first configured account."""
+    return get_accounts()[0].client
+
+
+def accounts_for(channel_key: str | int) -> list[Account]:
+    """Accounts in preference order for a channel: its shard owner first, then failovers."""
+    get_accounts()
+    assert _ring is not None
+    return [_accounts[name] for name in _ring.preference(str(channel_key))]
+
+
+def pick_account(channel_key: str | int) -> Account:
+    """The channel's owner account, or the first failover that is not flood-waited."""
+    candidates = accounts_for(channel_key)
+    for account in candidates:
+        if account.governor.blocked_for() == 0:
+            return account
+    return min(candidates, key=lambda a: a.governor.blocked_for())
+
+
+def retry_delay(channel_key: str | int) -> int:
+    """Seconds until some account serving this channel can make calls again."""
+    return int(min(a.governor.blocked_for() for a in accounts_for(channel_key))) + 1
+
+
+async def start_client(account: Optional[Account] = None) -> None:
+    for acc in [account] if account else get_accounts():
+        if not acc.client.is_connected():
+            await acc.client.connect()
 
 
 async def stop_client() -> None:
-    global _client
-    if _client is not None:
-        await _client.disconnect()
+    for acc in _accounts.values():
+        await acc.client.disconnect()
+
+
+async def _governed(account: Account, coro_fn, *args, **kwargs):
+    """Run a single Telethon request under the account's rate governor."""
+    await account.governor.acquire()
+    method = coro_fn.__name__
+    started = time.perf_counter()
+    try:
+        result = await coro_fn(*args, **kwargs)
+    except FloodWaitError as exc:
+        account.governor.on_flood_wait(exc.seconds)
+        observe_flood_wait(method, exc.seconds)
+        raise
+    finally:
+        TELEGRAM_REQUEST_SECONDS.labels(method).observe(time.perf_counter() - started)
+    account.governor.on_success()
+    return result
+
+
+def remember_peer(account: Account, tg_id: int, access_hash: int) -> None:
+    account.peers[tg_id] = access_hash
+    account.peers.move_to_end(tg_id)
+    while len(account.peers) > settings.tg_peer_cache_size:
+        account.peers.popitem(last=False)
+
+
+def forget_peer(account: Account, tg_id: int) -> None:
+    account.peers.pop(tg_id, None)
+
+
+def cached_access_hash(account: Account, tg_id: int) -> Optional[int]:
+    access_hash = account.peers.get(tg_id)
+    if access_hash is not None:
+        account.peers.move_to_end(tg_id)
+    return access_hash
+
+
+async def _resolve_entity(account: Account, tg_ref: str | int) -> Any:
+    entity = await _governed(account, account.client.get_entity, tg_ref)
+    access_hash = getattr(entity, "access_hash", None)
+    if access_hash is not None:
+        remember_peer(account, int(entity.id), int(access_hash))
+    return entity
+
+
+async def _input_entity(
+    account: Account,
+    tg_ref: str | int,
+    tg_id: Optional[int],
+    access_hash: Optional[int],
+    access_hash_account: Optional[str],
+) -> tuple[Any, bool]:
+    """Build the input peer without an RPC when a hash for this account is known.
+
+    Returns the entity and whether it came from a cached hash.
+    """
+    # Rows written before multi-account support carry hashes of the first session
+    owner = access_hash_account or account_name(settings.tg_session_paths[0])
+    if access_hash is not None and owner != account.name:
+        access_hash = None
+    if tg_id is not None and access_hash is None:
+        access_hash = cached_access_hash(account, tg_id)
+    if tg_id is not None and access_hash is not None:
+        return InputPeerChannel(channel_id=tg_id, access_hash=access_hash), True
+    return await _resolve_entity(account, tg_ref), False
 
 
 @dataclass
 class ResolvedChannel:
     tg_id: int
     title: str
+    access_hash: Optional[int] = None
+    account: Optional[str] = None
 
 
 async def resolve_channel(tg_url: str) -> ResolvedChannel:
-    client = get_client()
-    await start_client()
-    entity = await client.get_entity(tg_url)
+    account = pick_account(tg_url)
+    await start_client(account)
+    entity = await _resolve_entity(account, tg_url)
     if not hasattr(entity, "id"):
         raise ValueError("Unsupported entity type")
     title = getattr(entity, "title", None) or getattr(entity, "username", "") or str(entity.id)
-    return ResolvedChannel(tg_id=int(entity.id), title=title)
+    access_hash = getattr(entity, "access_hash", None)
+    return ResolvedChannel(
+        tg_id=int(entity.id),
+        title=title,
+        access_hash=int(access_hash) if access_hash is not None else None,
+        account=account.name,
+    )
+
+
+def known_peer(tg_ref: str | int, tg_id: int) -> Optional[tuple[str, int]]:
+    """(account, access_hash) currently cached by the channel's owner account, if any."""
+    account = accounts_for(tg_ref)[0]
+    access_hash = cached_access_hash(account, tg_id)
+    return (account.name, access_hash) if access_hash is not None else None
+
+
+async def fetch_history(
+    tg_ref: str | int,
+    limit: Optional[int] = 200,
+    tg_id: Optional[int] = None,
+    access_hash: Optional[int] = None,
+    access_hash_account: Optional[str] = None,
+    min_id: int = 0,
+) -> Iterable[dict]:
+    """Fetch recent messages on the channel's account, reusing a known peer when possible.
+
+    ``tg_ref`` (the t.me URL, username, or numeric id) picks the account by
+    consistent hashing. When ``tg_id`` is given and an access_hash for that
+    account is known (passed in or cached) the input peer is built directly,
+    without a ``get_entity`` round trip. If Telegram rejects the cached hash,
+    the peer is resolved once from ``tg_ref``. Only messages newer than
+    ``min_id`` are returned.
+    """
+    account = pick_account(tg_ref)
+    client = account.client
+    await start_client(account)
+    entity, from_cache = await _input_entity(account, tg_ref, tg_id, access_hash, access_hash_account)
+    messages = client.iter_messages(entity=entity, limit=limit, min_id=min_id)
+    received = 0
+    while True:
+        # Each page of history is one request; take a token before it is sent
+        new_page = received % _HISTORY_PAGE_SIZE == 0
+        if new_page:
+            await account.governor.acquire()
+        started = time.perf_counter()
+        try:
+            message = await messages.__anext__()
+        except StopAsyncIteration:
+            break
+        except FloodWaitError as exc:
+            account.governor.on_flood_wait(exc.seconds)
+            observe_flood_wait("get_history", exc.seconds)
+            raise
+        except (ChannelInvalidError, PeerIdInvalidError):
+            if not from_cache or received:
+                raise
+            # Stale access_hash: resolve once and start over
+            forget_peer(account, tg_id)
+            from_cache = False
+            entity = await _resolve_entity(account, tg_ref)
+            messages = client.iter_messages(entity=entity, limit=limit, min_id=min_id)
+            continue
+        finally:
+            if new_page:
+                TELEGRAM_REQUEST_SECONDS.labels("get_history").observe(time.perf_counter() - started)
+        if new_page:
+            account.governor.on_success()
+        received += 1
+        yield message_to_dict(message)
+
+
+def message_to_dict(message: Any) -> dict:
+    """Normalize a Telethon message into the dict shape used for ingestion."""
+    return {
+        "id": int(message.id),
+        "date": message.date.isoformat() if message.date else None,
+        "text": message.text or None,
+        **_message_metrics(message),
+    }
+
+
+def _message_metrics(message: Any) -> dict:
+    views = getattr(message, "views", None)
+    forwards = getattr(message, "forwards", None)
+    replies_obj = getattr(message, "replies", None)
+    replies = int(getattr(replies_obj, "replies", 0)) if replies_obj is not None else None
+    reactions_total = None
+    reactions_obj = getattr(message, "reactions", None)
+    if reactions_obj is not None:
+        try:
+            results = getattr(reactions_obj, "results", None)
+            if results is not None:
+                total = 0
+                for r in results:  # type: ignore[assignment]
+                    count = getattr(r, "count", 0)
+                    total += int(count or 0)
+                reactions_total = total
+        except Exception:  # noqa: BLE001
+            reactions_total = None
+    return {
+        "views": int(views) if views is not None else None,
+        "forwards": int(forwards) if forwards is not None else None,
+        "replies": replies,
+        "reactions": reactions_total,
+    }
 
 
-async def fetch_history(tg_ref: str | int, limit: int = 200) -> Iterable[dict]:
-    """Fetch recent messages using a robust entity resolution.
+async def fetch_message_metrics(
+    tg_ref: str | int,
+    message_ids: list[int],
+    tg_id: Optional[int] = None,
+    access_hash: Optional[int] = None,
+    access_hash_account: Optional[str] = None,
+) -> list[dict]:
+    """Fetch engagement counters for known message ids.
 
-    tg_ref may be a t.me URL, username, or numeric id. For reliability,
-    prefer URL/username so Telethon resolves access_hash automatically.
+    Ids are requested in batches of up to 100 per ``channels.getMessages``
+    call on the channel's account. Returns one dict per message that still
+    exists, with ``id`` and the metric fields only.
     """
-    client = get_client()
-    await start_client()
-    entity = await client.get_entity(tg_ref)
-    async for message in client.iter_messages(entity=entity, limit=limit):
-        views = getattr(message, "views", None)
-        forwards = getattr(message, "forwards", None)
-        replies_obj = getattr(message, "replies", None)
-        replies = int(getattr(replies_obj, "replies", 0)) if replies_obj is not None else None
-        reactions_total = None
-        reactions_obj = getattr(message, "reactions", None)
-        if reactions_obj is not None:
-            try:
-                results = getattr(reactions_obj, "results", None)
-                if results is not None:
-                    total = 0
-                    for r in results:  # type: ignore[assignment]
-                        count = getattr(r, "count", 0)
-                        total += int(count or 0)
-                    reactions_total = total
-            except Exception:  # noqa: BLE001
-                reactions_total = None
-
-        yield {
-            "id": int(message.id),
-            "date": message.date.isoformat() if message.date else None,
-            "text": message.text or None,
-            "views": int(views) if views is not None else None,
-            "forwards": int(forwards) if forwards is not None else None,
-            "replies": replies,
-            "reactions": reactions_total,
-        }
+    account = pick_account(tg_ref)
+    await start_client(account)
+    entity, from_cache = await _input_entity(account, tg_ref, tg_id, access_hash, access_hash_account)
+    out: list[dict] = []
+    for i in range(0, len(message_ids), _HISTORY_PAGE_SIZE):
+        ids = message_ids[i : i + _HISTORY_PAGE_SIZE]
+        try:
+            messages = await _governed(account, account.client.get_messages, entity, ids=ids)
+        except (ChannelInvalidError, PeerIdInvalidError):
+            if not from_cache or i:
+                raise
+            # Stale access_hash: resolve once and retry
+            forget_peer(account, tg_id)
+            from_cache = False
+            entity = await _resolve_entity(account, tg_ref)
+            messages = await _governed(account, account.client.get_messages, entity, ids=ids)
+        for message in messages:
+            if message is not None:
+                out.append({"id": int(message.id), **_message_metrics(message)})
+    return out
 
 
+async def joined_channel_ids(account: Account) -> set[int]:
+    """Return tg ids of channels the account is a member of (and so receives updates for)."""
+    await start_client(account)
+    dialogs = await _governed(account, account.client.get_dialogs)
+    return {int(d.entity.id) for d in dialogs if d.is_channel}
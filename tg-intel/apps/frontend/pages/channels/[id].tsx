@@ -24,7 +24,8 @@ type PostsPage = {
   items: Post[];
   page: number;
   page_size: number;
-  total: number;
+  total: number | null;
+  next_cursor: string | null;
 };
 
 const API_BASE = process.env.NEXT_PUBLIC_API_BASE || "http://localhost:8000";
@@ -46,7 +47,10 @@ export default function Channel() {
     setError(null);
     try {
       const url = new URL(`${API_BASE}/api/channels/${id}/posts`);
-      if (q) url.searchParams.set("query", q);
+      if (q) {
+        url.searchParams.set("query", q);
+        url.searchParams.set("include_total", "true");
+      }
       url.searchParams.set("page", String(page));
       url.searchParams.set("page_size", "20");
       const res = await fetch(url.toString());
@@ -153,7 +157,7 @@ export default function Channel() {
                 <CheckCircle className="w-5 h-5 text-green-500" />
                 <div>
                   <p className="text-sm font-medium text-muted-foreground">Всего постов</p>
-                  <p className="text-2xl font-bold">{data?.total || 0}</p>
+                  <p className="text-2xl font-bold">{data?.total ?? 0}</p>
                 </div>
               </div>
             </CardContent>
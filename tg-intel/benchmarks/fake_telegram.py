@@ -0,0 +1,131 @@
+"""Local stand-in for the Telegram side of ingestion: seeded, realistic message streams.
+
+``FakeTelegram.install()`` swaps it in for ``resolve_channel``, ``fetch_history``
+and ``known_peer`` in ``services.fetcher``, so ``process_fetch_job`` runs its
+full path (job bookkeeping, batching, upserts, rescheduling) without an account.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Optional
+import asyncio
+import math
+import random
+import zlib
+
+from apps.backend.services import fetcher
+from apps.backend.services.telegram import ResolvedChannel
+
+_WORDS = (
+    "новости рынок компания запуск обновление релиз данные модель канал пост неделя итоги "
+    "аналитика интервью продукт команда рост выручка пользователи сервис платформа "
+    "update release market launch data model weekly growth revenue users service team"
+).split()
+
+
+@dataclass
+class StreamConfig:
+    """Shape of the generated channels.
+
+    Text lengths are log-normal around ``text_median`` characters (Telegram
+    caps them at 4096); ``no_text_share`` of messages are media without a
+    caption. Posts are spaced by exponential gaps of ``mean_gap_minutes``
+    ending now. Views are log-normal around ``views_median`` and the other
+    counters scale with them.
+    """
+
+    # History jobs read at most 1000 messages per run (see _fetch_new_posts); scale with channels instead
+    messages: int = 1000
+    text_median: int = 280
+    text_sigma: float = 1.0
+    no_text_share: float = 0.1
+    mean_gap_minutes: float = 90
+    views_median: int = 2000
+    metrics: bool = True
+    page_latency_ms: float = 0.0
+    seed: int = 42
+
+
+def _text(rng: random.Random, length: int) -> str:
+    words: list[str] = []
+    size = 0
+    while size < length:
+        w = rng.choice(_WORDS)
+        words.append(w)
+        size += len(w) + 1
+    # Long posts come in paragraphs, as real ones do
+    out = " ".join(words)[:length]
+    return out if length < 400 else "\n\n".join(out[i:i + 400] for i in range(0, len(out), 400))
+
+
+def generate_messages(config: StreamConfig, channel_seed: int, now: Optional[datetime] = None) -> list[dict]:
+    """Messages of one channel, newest first, in the ``message_to_dict`` shape."""
+    rng = random.Random(config.seed * 1_000_003 + channel_seed)
+    now = now or datetime.now(timezone.utc)
+    out: list[dict] = []
+    posted = now
+    for msg_id in range(config.messages, 0, -1):
+        posted -= timedelta(minutes=rng.expovariate(1 / config.mean_gap_minutes))
+        text = None
+        if rng.random() >= config.no_text_share:
+            text = _text(rng, min(4096, max(1, int(rng.lognormvariate(math.log(config.text_median), config.text_sigma)))))
+        msg: dict[str, Any] = {"id": msg_id, "date": posted.isoformat(), "text": text,
+                               "views": None, "forwards": None, "replies": None, "reactions": None}
+        if config.metrics:
+            views = int(rng.lognormvariate(math.log(config.views_median), 1.2))
+            msg.update(
+                views=views,
+                forwards=int(views * rng.uniform(0, 0.02)),
+                replies=int(views * rng.uniform(0, 0.005)) if rng.random() < 0.6 else None,
+                reactions=int(views * rng.uniform(0, 0.03)),
+            )
+        out.append(msg)
+    return out
+
+
+@dataclass
+class FakeTelegram:
+    config: StreamConfig = field(default_factory=StreamConfig)
+    # Telegram calls made, by method, as the real client would send them
+    calls: dict[str, int] = field(default_factory=dict)
+    _streams: dict[str, list[dict]] = field(default_factory=dict)
+
+    def prepare(self, tg_url: str) -> None:
+        """Generate a channel's stream up front, so generation is not timed as ingestion."""
+        self._streams[tg_url] = generate_messages(self.config, zlib.crc32(tg_url.encode()))
+
+    def _count(self, method: str) -> None:
+        self.calls[method] = self.calls.get(method, 0) + 1
+
+    async def resolve_channel(self, tg_url: str) -> ResolvedChannel:
+        self._count("get_entity")
+        tg_id = zlib.crc32(tg_url.encode()) + 1_000_000_000
+        return ResolvedChannel(tg_id=tg_id, title=f"Bench {tg_url.rsplit('/', 1)[-1]}", access_hash=tg_id * 7, account="bench")
+
+    async def fetch_history(
+        self,
+        tg_ref: str | int,
+        limit: Optional[int] = 200,
+        tg_id: Optional[int] = None,
+        access_hash: Optional[int] = None,
+        access_hash_account: Optional[str] = None,
+        min_id: int = 0,
+    ) -> AsyncIterator[dict]:
+        if str(tg_ref) not in self._streams:
+            self.prepare(str(tg_ref))
+        stream = [m for m in self._streams[str(tg_ref)] if m["id"] > min_id]
+        for i, msg in enumerate(stream[:limit] if limit else stream):
+            if i % 100 == 0:
+                self._count("get_history")
+                if self.config.page_latency_ms:
+                    await asyncio.sleep(self.config.page_latency_ms / 1000)
+            yield msg
+
+    def known_peer(self, tg_ref: str | int, tg_id: int) -> None:
+        return None
+
+    def install(self) -> None:
+        fetcher.resolve_channel = self.resolve_channel
+        fetcher.fetch_history = self.fetch_history
+        fetcher.known_peer = self.known_peer
@@ -0,0 +1,207 @@
+"""Ingestion throughput benchmark: python -m benchmarks.ingest --dsn postgresql://localhost/tg_intel_bench
+
+Runs ``process_fetch_job`` (history mode) for fresh channels fed by the fake
+Telegram source against a local Postgres, then reports messages per second,
+database round trips and peak memory. With ``--baseline`` it exits with
+status 1 when throughput drops, or round trips per message grow, by more
+than ``--max-regression``.
+
+Never point it at production: it applies the schema and writes channels,
+posts and jobs (removed afterwards unless ``--keep``).
+"""
+from __future__ import annotations
+
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+from dotenv import load_dotenv
+import psycopg
+
+from apps.backend.core import db
+from apps.backend.core.config import settings
+from apps.backend.services.fetcher import process_fetch_job
+from benchmarks.fake_telegram import FakeTelegram, StreamConfig
+
+SCHEMA = Path(__file__).resolve().parents[1] / "infra" / "sql" / "schema.sql"
+
+
+class RoundTrips:
+    """Counts statements sent by async cursors (one network round trip each, no pipelining in the app)."""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def install(self) -> None:
+        original = psycopg.AsyncCursor.execute
+        counter = self
+
+        async def execute(cur: Any, *args: Any, **kwargs: Any) -> Any:
+            counter.count += 1
+            return await original(cur, *args, **kwargs)
+
+        psycopg.AsyncCursor.execute = execute  # type: ignore[method-assign]
+
+
+def parse_args() -> argparse.Namespace:
+    defaults = StreamConfig()
+    parser = argparse.ArgumentParser(description="Benchmark the fetch path with a fake Telegram source.")
+    parser.add_argument("--dsn", default=None, help="local Postgres (default: BENCH_DB_URL)")
+    parser.add_argument("--channels", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=defaults.messages, help="per channel (history jobs read at most 1000)")
+    parser.add_argument("--workers", type=int, default=settings.fetch_workers, help="jobs processed concurrently")
+    parser.add_argument("--batch-size", type=int, default=settings.fetch_batch_size)
+    parser.add_argument("--text-median", type=int, default=defaults.text_median, help="median text length, characters")
+    parser.add_argument("--no-text-share", type=float, default=defaults.no_text_share, help="share of media-only messages")
+    parser.add_argument("--no-metrics", action="store_true", help="generate messages without views/forwards/replies/reactions")
+    parser.add_argument("--page-latency-ms", type=float, default=0.0, help="simulated Telegram latency per history page")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--trace-memory", action="store_true", help="also report the Python heap peak (tracemalloc; slows the run, so throughput is not checked)")
+    parser.add_argument("--skip-schema", action="store_true", help="do not apply infra/sql/schema.sql first")
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark channels and their posts")
+    parser.add_argument("--baseline", help="report JSON of an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.15, help="allowed fractional regression vs. the baseline")
+    parser.add_argument("--min-rate", type=float, default=0.0, help="fail below this many messages per second")
+    parser.add_argument("-o", "--output", help="write the report JSON here (use as a later --baseline)")
+    return parser.parse_args()
+
+
+def _rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def run(args: argparse.Namespace, dsn: str) -> dict:
+    config = StreamConfig(
+        messages=args.messages,
+        text_median=args.text_median,
+        no_text_share=args.no_text_share,
+        metrics=not args.no_metrics,
+        page_latency_ms=args.page_latency_ms,
+        seed=args.seed,
+    )
+    fake = FakeTelegram(config)
+    fake.install()
+    settings.fetch_batch_size = args.batch_size
+
+    if not args.skip_schema:
+        async with await psycopg.AsyncConnection.connect(dsn, autocommit=True) as conn:
+            await conn.execute(SCHEMA.read_text(encoding="utf-8"))
+
+    await db.init_pool(dsn, max_size=args.workers + 1)
+    run_tag = f"bench{int(time.time())}"
+    urls = [f"https://t.me/{run_tag}_{i}" for i in range(args.channels)]
+    for url in urls:
+        fake.prepare(url)
+    async with db.require_pool().connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "insert into channels (tg_url) select unnest(%s::text[]) returning id",
+                (urls,),
+            )
+            channel_ids = [r[0] for r in await cur.fetchall()]
+            await cur.execute(
+                "insert into fetch_jobs (channel_id, status, kind, started_at) "
+                "select unnest(%s::bigint[]), 'running', 'history', now() returning id",
+                (channel_ids,),
+            )
+            job_ids = [r[0] for r in await cur.fetchall()]
+
+    trips = RoundTrips()
+    trips.install()
+    if args.trace_memory:
+        tracemalloc.start()
+    rss_before = _rss_mb()
+    slots = asyncio.Semaphore(args.workers)
+
+    async def one(job_id: int) -> None:
+        async with slots:
+            await process_fetch_job(job_id)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(j) for j in job_ids))
+    elapsed = time.perf_counter() - started
+    round_trips = trips.count
+    heap_peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024) if args.trace_memory else None
+    if args.trace_memory:
+        tracemalloc.stop()
+
+    async with db.require_pool().connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("select count(*) from posts where channel_id = any(%s)", (channel_ids,))
+            stored = (await cur.fetchone())[0]
+            await cur.execute(
+                "select status, count(*) from fetch_jobs where id = any(%s) group by status",
+                (job_ids,),
+            )
+            statuses = dict(await cur.fetchall())
+            if not args.keep:
+                await cur.execute("delete from channels where id = any(%s)", (channel_ids,))
+    await db.close_pool()
+
+    expected = args.channels * min(args.messages, 1000)
+    return {
+        "config": {**asdict(config), "channels": args.channels, "workers": args.workers, "batch_size": args.batch_size},
+        "messages": stored,
+        "expected_messages": expected,
+        "job_statuses": statuses,
+        "seconds": round(elapsed, 3),
+        "messages_per_second": round(stored / elapsed, 1) if elapsed else 0.0,
+        "db_round_trips": round_trips,
+        "db_round_trips_per_1k_messages": round(round_trips * 1000 / stored, 2) if stored else None,
+        "telegram_calls": fake.calls,
+        "peak_rss_mb": round(_rss_mb(), 1),
+        "rss_growth_mb": round(_rss_mb() - rss_before, 1),
+        "python_heap_peak_mb": round(heap_peak, 1) if heap_peak is not None else None,
+    }
+
+
+def check(report: dict, args: argparse.Namespace) -> list[str]:
+    """Reasons to fail the run, empty when it passes."""
+    failures = []
+    if report["messages"] != report["expected_messages"] or set(report["job_statuses"]) != {"success"}:
+        failures.append(f"ingested {report['messages']} of {report['expected_messages']} messages, jobs: {report['job_statuses']}")
+    if args.trace_memory:
+        return failures
+    if args.min_rate and report["messages_per_second"] < args.min_rate:
+        failures.append(f"{report['messages_per_second']} msg/s is below --min-rate {args.min_rate}")
+    if args.baseline:
+        base = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        floor = base["messages_per_second"] * (1 - args.max_regression)
+        if report["messages_per_second"] < floor:
+            failures.append(f"{report['messages_per_second']} msg/s regressed past {floor:.1f} (baseline {base['messages_per_second']})")
+        base_trips = base.get("db_round_trips_per_1k_messages")
+        trips = report["db_round_trips_per_1k_messages"]
+        if base_trips and trips and trips > base_trips * (1 + args.max_regression):
+            failures.append(f"{trips} round trips per 1k messages, baseline {base_trips}")
+    return failures
+
+
+def main() -> None:
+    args = parse_args()
+    load_dotenv()
+    dsn = args.dsn or os.getenv("BENCH_DB_URL")
+    if not dsn:
+        sys.exit("Pass --dsn or set BENCH_DB_URL (a local database; the benchmark writes to it)")
+    report = asyncio.run(run(args, dsn))
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    failures = check(report, args)
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+"""API query-latency benchmark: python -m benchmarks.queries --dsn postgresql://localhost/tg_intel_bench
+
+Load-tests the read endpoints against a database filled by benchmarks.seed:
+each scenario is requested ``--requests`` times by ``--concurrency`` clients
+and reported as p50/p95/p99 latency. The app runs in-process (response cache
+off) unless ``--base-url`` points at a running server.
+
+Every scenario is also requested once with statement capture on, and each
+captured query is re-run under ``EXPLAIN (ANALYZE, BUFFERS)``. Plans are
+reduced to their scans (node type, index, table; partitions folded together,
+empty ones left out) and joins. With ``--baseline`` the run exits with
+status 1 when a scenario's p95 regresses by more than ``--max-regression``
+(and ``--min-delta-ms``) or a plan loses an index (an index no longer used,
+or a new sequential scan); other plan changes are reported as warnings.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional
+from urllib.parse import urlencode
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import re
+import sys
+import time
+
+from dotenv import load_dotenv
+import httpx
+import psycopg
+
+from apps.backend.api.posts import encode_cursor
+from apps.backend.app import app
+from apps.backend.core import db
+from apps.backend.core.cache import response_cache
+from benchmarks.fake_telegram import _WORDS
+
+
+@dataclass
+class Sample:
+    """Request parameters drawn from the database under test."""
+
+    channel_ids: list[int]
+    # (channel_id, posted_at, post id) of random posts, for cursors and metrics history
+    positions: list[tuple[int, Any, int]]
+    terms: list[str]
+
+
+@dataclass
+class Scenario:
+    name: str
+    path: Callable[[random.Random, Sample], str]
+
+
+def _posts(params: dict) -> Callable[[random.Random, Sample], str]:
+    def path(rng: random.Random, s: Sample) -> str:
+        query = {k: (v(rng, s) if callable(v) else v) for k, v in params.items()}
+        return f"/api/channels/{rng.choice(s.channel_ids)}/posts" + (f"?{urlencode(query)}" if query else "")
+    return path
+
+
+def _cursor_path(rng: random.Random, s: Sample) -> str:
+    channel_id, posted_at, post_id = rng.choice(s.positions)
+    return f"/api/channels/{channel_id}/posts?" + urlencode({"cursor": encode_cursor(posted_at, post_id)})
+
+
+def _term(rng: random.Random, s: Sample) -> str:
+    return rng.choice(s.terms)
+
+
+def _phrase(rng: random.Random, s: Sample) -> str:
+    return " ".join(rng.sample(s.terms, 2))
+
+
+SCENARIOS = [
+    Scenario("channels", lambda rng, s: "/api/channels"),
+    Scenario("posts_by_date", _posts({})),
+    Scenario("posts_by_views", _posts({"sort": "views"})),
+    Scenario("posts_cursor", _cursor_path),
+    Scenario("posts_offset", _posts({"page": 50})),
+    Scenario("posts_query", _posts({"query": _term})),
+    Scenario("posts_query_total", _posts({"query": _term, "include_total": "true"})),
+    Scenario("search", lambda rng, s: "/api/search?" + urlencode({"q": _phrase(rng, s)})),
+    Scenario("search_channel", lambda rng, s: "/api/search?" + urlencode({"q": _term(rng, s), "channel_id": rng.choice(s.channel_ids)})),
+    Scenario("latest_job", lambda rng, s: f"/api/channels/{rng.choice(s.channel_ids)}/jobs/latest"),
+    Scenario("channel_activity", lambda rng, s: f"/api/analytics/channels/{rng.choice(s.channel_ids)}/activity"),
+    Scenario("metrics_history", lambda rng, s: f"/api/posts/{rng.choice(s.positions)[2]}/metrics/history"),
+]
+
+
+class StatementLog:
+    """Records the queries sent by async cursors while ``active``."""
+
+    def __init__(self) -> None:
+        self.active = False
+        self.statements: list[tuple[str, Any]] = []
+
+    def install(self) -> None:
+        original = psycopg.AsyncCursor.execute
+        log = self
+
+        async def execute(cur: Any, query: Any, params: Any = None, **kwargs: Any) -> Any:
+            if log.active:
+                log.statements.append((query, params))
+            return await original(cur, query, params, **kwargs)
+
+        psycopg.AsyncCursor.execute = execute  # type: ignore[method-assign]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure read endpoint latency and query plans at scale.")
+    parser.add_argument("--dsn", default=None, help="database filled by benchmarks.seed (default: BENCH_DB_URL)")
+    parser.add_argument("--base-url", help="load-test a running server instead of the in-process app")
+    parser.add_argument("--scenarios", help=f"comma-separated subset of: {', '.join(s.name for s in SCENARIOS)}")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests per scenario first")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--terms", help="comma-separated search terms (default: the fake Telegram vocabulary)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-explain", action="store_true", help="skip EXPLAIN (ANALYZE, BUFFERS) of the captured queries")
+    parser.add_argument("--plans-dir", help="also write each full EXPLAIN JSON here, as <scenario>-<n>.json")
+    parser.add_argument("--baseline", help="report JSON of an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="allowed fractional p95 regression vs. the baseline")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="ignore p95 regressions smaller than this (timer noise on fast endpoints)")
+    parser.add_argument("-o", "--output", help="write the report JSON here (use as a later --baseline)")
+    return parser.parse_args()
+
+
+async def load_sample(terms: list[str], seed: int, size: int = 2000) -> Sample:
+    async with db.require_pool().connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("select id, post_count from channels where post_count > 0 order by id")
+            channels = await cur.fetchall()
+            if not channels:
+                sys.exit("No channels with posts; fill the database with benchmarks.seed first")
+            total = sum(n for _, n in channels)
+            await cur.execute(
+                f"select channel_id, posted_at, id from posts tablesample system ({min(100.0, 100.0 * size * 4 / total)}) repeatable (%s) limit %s",
+                (seed, size),
+            )
+            positions = await cur.fetchall()
+    return Sample(channel_ids=[c for c, _ in channels], positions=positions, terms=terms)
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+async def load_test(client: httpx.AsyncClient, scenario: Scenario, sample: Sample, args: argparse.Namespace) -> dict:
+    rng = random.Random(f"{args.seed}:{scenario.name}")
+    paths = [scenario.path(rng, sample) for _ in range(args.warmup + args.requests)]
+    latencies: list[float] = []
+    errors: dict[int, int] = {}
+    queue = iter(enumerate(paths))
+
+    async def client_loop() -> None:
+        for i, path in queue:
+            started = time.perf_counter()
+            response = await client.get(path)
+            elapsed = (time.perf_counter() - started) * 1000
+            if response.status_code >= 400:
+                errors[response.status_code] = errors.get(response.status_code, 0) + 1
+            if i >= args.warmup:
+                latencies.append(elapsed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": round(len(paths) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2),
+    }
+
+
+_PARTITION = re.compile(r"_y\d{4}m\d{2}")
+_SCAN = re.compile(r"Scan$")
+
+
+def plan_shape(plan: dict) -> dict:
+    """Scans as ``<node> [using <index>] [on <table>]`` and join/sort nodes, partitions folded into one name."""
+    scans: set[str] = set()
+    nodes: set[str] = set()
+
+    def walk(node: dict) -> None:
+        kind = node["Node Type"]
+        touched = node.get("Actual Rows", 0) or node.get("Shared Hit Blocks", 0) or node.get("Shared Read Blocks", 0)
+        if _SCAN.search(kind):
+            if not touched:
+                # Empty partitions (months ahead, sparse ones) are scanned any which way
+                return
+            desc = kind
+            if node.get("Index Name"):
+                desc += f" using {_PARTITION.sub('_yYYYYmMM', node['Index Name'])}"
+            if node.get("Relation Name"):
+                desc += f" on {_PARTITION.sub('_yYYYYmMM', node['Relation Name'])}"
+            scans.add(desc)
+        elif kind not in ("Append", "Result", "Limit", "Subquery Scan"):
+            nodes.add(kind)
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan)
+    return {"scans": sorted(scans), "nodes": sorted(nodes)}
+
+
+def _read_only(query: str) -> bool:
+    # EXPLAIN ANALYZE executes the statement; the read endpoints should only send selects
+    text = query.lstrip().lower()
+    return text.startswith(("select", "with")) and not re.search(r"\b(insert|update|delete)\b", text)
+
+
+async def explain(scenario: Scenario, sample: Sample, client: httpx.AsyncClient, log: StatementLog, args: argparse.Namespace) -> list[dict]:
+    """Request the scenario once, recording its queries, and EXPLAIN ANALYZE each of them."""
+    path = scenario.path(random.Random(f"{args.seed}:{scenario.name}:explain"), sample)
+    log.statements = []
+    log.active = True
+    try:
+        await client.get(path)
+    finally:
+        log.active = False
+    out = []
+    async with db.require_pool().connection() as conn:
+        async with conn.cursor() as cur:
+            for n, (query, params) in enumerate(log.statements):
+                query = str(query)
+                if not _read_only(query):
+                    continue
+                await cur.execute("explain (analyze, buffers, format json) " + query, params)
+                result = (await cur.fetchone())[0]
+                top = result[0]
+                if args.plans_dir:
+                    target = Path(args.plans_dir) / f"{scenario.name}-{n}.json"
+                    target.write_text(json.dumps({"path": path, "query": query, "plan": result}, indent=2, default=str), encoding="utf-8")
+                out.append({
+                    "query": " ".join(query.split()),
+                    "execution_ms": round(top["Execution Time"], 3),
+                    "planning_ms": round(top["Planning Time"], 3),
+                    "shared_hit_blocks": top["Plan"].get("Shared Hit Blocks", 0),
+                    "shared_read_blocks": top["Plan"].get("Shared Read Blocks", 0),
+                    **plan_shape(top["Plan"]),
+                })
+    return out
+
+
+async def run(args: argparse.Namespace, dsn: str) -> dict:
+    scenarios = SCENARIOS
+    if args.scenarios:
+        wanted = set(args.scenarios.split(","))
+        unknown = wanted - {s.name for s in SCENARIOS}
+        if unknown:
+            sys.exit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        scenarios = [s for s in SCENARIOS if s.name in wanted]
+    terms = args.terms.split(",") if args.terms else list(_WORDS)
+    if args.plans_dir:
+        Path(args.plans_dir).mkdir(parents=True, exist_ok=True)
+
+    # Measure the database, not the response cache
+    response_cache.ttl_seconds = 0
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    log = StatementLog()
+    log.install()
+    await db.init_pool(dsn, max_size=args.concurrency + 1)
+    sample = await load_sample(terms, args.seed)
+    local = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None)
+    target = httpx.AsyncClient(base_url=args.base_url, timeout=None) if args.base_url else local
+    report: dict[str, Any] = {
+        "config": {k: getattr(args, k) for k in ("base_url", "requests", "warmup", "concurrency", "seed")},
+        "scenarios": {},
+    }
+    try:
+        for scenario in scenarios:
+            result = await load_test(target, scenario, sample, args)
+            if not args.no_explain:
+                result["queries"] = await explain(scenario, sample, local, log, args)
+            report["scenarios"][scenario.name] = result
+            print(f"{scenario.name:<18} p50 {result['p50_ms']:>8} ms  p95 {result['p95_ms']:>8} ms  p99 {result['p99_ms']:>8} ms", file=sys.stderr)
+    finally:
+        await local.aclose()
+        if target is not local:
+            await target.aclose()
+        await db.close_pool()
+    return report
+
+
+def _indexes(scans: list[str]) -> set[str]:
+    return {s.split(" using ", 1)[1].split(" on ", 1)[0] for s in scans if " using " in s}
+
+
+def compare_plans(name: str, queries: list[dict], base_queries: list[dict]) -> tuple[list[str], list[str]]:
+    """(failures, warnings) for plan changes of one scenario against its baseline."""
+    failures: list[str] = []
+    warnings: list[str] = []
+    if len(queries) != len(base_queries):
+        warnings.append(f"{name}: {len(queries)} queries, baseline had {len(base_queries)}")
+    for n, (q, base) in enumerate(zip(queries, base_queries)):
+        where = f"{name} query {n}"
+        if q["query"] != base["query"]:
+            warnings.append(f"{where}: SQL changed")
+        for lost in sorted(_indexes(base["scans"]) - _indexes(q["scans"])):
+            failures.append(f"{where}: no longer uses index {lost} ({', '.join(q['scans'])})")
+        for scan in sorted(set(q["scans"]) - set(base["scans"])):
+            if scan.startswith("Seq Scan"):
+                failures.append(f"{where}: new {scan}")
+            else:
+                warnings.append(f"{where}: new {scan}")
+        if q["nodes"] != base["nodes"]:
+            warnings.append(f"{where}: plan nodes {', '.join(q['nodes'])} (baseline {', '.join(base['nodes'])})")
+    return failures, warnings
+
+
+def check(report: dict, args: argparse.Namespace) -> tuple[list[str], list[str]]:
+    """(failures, warnings); the run fails on any failure."""
+    failures: list[str] = []
+    warnings: list[str] = []
+    for name, result in report["scenarios"].items():
+        if result["errors"]:
+            failures.append(f"{name}: error responses {result['errors']}")
+    if not args.baseline:
+        return failures, warnings
+    base = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+    for name, result in report["scenarios"].items():
+        before: Optional[dict] = base["scenarios"].get(name)
+        if before is None:
+            continue
+        ceiling = max(before["p95_ms"] * (1 + args.max_regression), before["p95_ms"] + args.min_delta_ms)
+        if result["p95_ms"] > ceiling:
+            failures.append(f"{name}: p95 {result['p95_ms']} ms regressed past {ceiling:.2f} (baseline {before['p95_ms']})")
+        if "queries" in result and "queries" in before:
+            f, w = compare_plans(name, result["queries"], before["queries"])
+            failures += f
+            warnings += w
+    return failures, warnings
+
+
+def main() -> None:
+    args = parse_args()
+    load_dotenv()
+    dsn = args.dsn or os.getenv("BENCH_DB_URL")
+    if not dsn:
+        sys.exit("Pass --dsn or set BENCH_DB_URL (the database filled by benchmarks.seed)")
+    report = asyncio.run(run(args, dsn))
+    text = json.dumps(report, indent=2, ensure_ascii=False, default=str)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    failures, warnings = check(report, args)
+    for warning in warnings:
+        print(f"WARN: {warning}", file=sys.stderr)
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""Large synthetic dataset: python -m benchmarks.seed --dsn postgresql://localhost/tg_intel_bench --channels 1000 --posts 10000000
+
+Fills the schema of infra/sql/schema.sql with seeded channels, posts and fetch
+jobs through COPY, for checking queries at production scale (see
+benchmarks.queries). Channel sizes are log-normal, so a few channels hold
+most posts; messages come from the fake Telegram streams of
+benchmarks.fake_telegram, spread over ``--months`` of history. Posts go in
+through the normal triggers, so tsvectors, activity rollups and metric
+snapshots are the ones ingestion would have written.
+
+Contents are deterministic for a given ``--seed``; post ids depend on load
+order when ``--workers`` is above 1. Never point it at production.
+"""
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, replace
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from dotenv import load_dotenv
+import psycopg
+
+from benchmarks.fake_telegram import StreamConfig, generate_messages
+
+SCHEMA = Path(__file__).resolve().parents[1] / "infra" / "sql" / "schema.sql"
+
+_URL_PREFIX = "https://t.me/seed"
+
+_POST_COLUMNS = (
+    "channel_id", "tg_message_id", "posted_at", "text", "raw",
+    "views", "forwards", "replies", "reactions", "metrics_refreshed_at",
+)
+
+# Everything the seeder writes, directly or through triggers
+_DATA_TABLES = (
+    "channels", "posts", "fetch_jobs", "summaries", "summary_jobs", "channel_digests",
+    "channel_stats_hourly", "channel_stats_daily", "post_metric_snapshots", "post_archives",
+)
+
+
+def parse_args() -> argparse.Namespace:
+    defaults = StreamConfig()
+    parser = argparse.ArgumentParser(description="Fill a local database with a seeded, production-sized dataset.")
+    parser.add_argument("--dsn", default=None, help="local Postgres (default: BENCH_DB_URL)")
+    parser.add_argument("--channels", type=int, default=1000)
+    parser.add_argument("--posts", type=int, default=10_000_000, help="total across channels")
+    parser.add_argument("--months", type=int, default=24, help="history covered by the posts")
+    parser.add_argument("--size-sigma", type=float, default=1.0, help="log-normal spread of posts per channel (0: equal sizes)")
+    parser.add_argument("--jobs-per-channel", type=int, default=50, help="finished fetch jobs per channel")
+    parser.add_argument("--text-median", type=int, default=defaults.text_median, help="median text length, characters")
+    parser.add_argument("--no-text-share", type=float, default=defaults.no_text_share, help="share of media-only messages")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="loader processes (one connection each)")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--skip-schema", action="store_true", help="do not apply infra/sql/schema.sql first")
+    parser.add_argument("--reset", action="store_true", help=f"truncate {', '.join(_DATA_TABLES)} first")
+    parser.add_argument("-o", "--output", help="write the report JSON here")
+    return parser.parse_args()
+
+
+def channel_sizes(rng: random.Random, channels: int, posts: int, sigma: float) -> list[int]:
+    """Posts per channel: log-normal weights scaled to ``posts`` in total, at least one each."""
+    weights = [rng.lognormvariate(0, sigma) for _ in range(channels)]
+    scale = max(posts - channels, 0) / sum(weights)
+    sizes = [1 + int(w * scale) for w in weights]
+    # Rounding leftovers go to the largest channel
+    sizes[sizes.index(max(sizes))] += posts - sum(sizes)
+    return sizes
+
+
+def _month_start(iso: str) -> str:
+    return iso[:7] + "-01T00:00:00+00:00"
+
+
+def load_channels(dsn: str, config: dict, channels: list[tuple[int, int, int, int]], now: str, window_minutes: float) -> int:
+    """Generate and COPY the posts of ``channels`` (index, id, size, views median); returns rows written.
+
+    Runs in a worker process: one COPY statement (and transaction) per channel,
+    after creating the monthly partitions its posts fall into.
+    """
+    base = StreamConfig(**config)
+    end = datetime.fromisoformat(now)
+    months: set[str] = set()
+    written = 0
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        for index, channel_id, size, views_median in channels:
+            stream = replace(base, messages=size, mean_gap_minutes=window_minutes / size, views_median=views_median)
+            messages = generate_messages(stream, index, end)
+            rng = random.Random(base.seed * 7919 + index)
+            for month in {_month_start(m["date"]) for m in messages} - months:
+                conn.execute("select create_monthly_partition('posts', %s::timestamptz)", (month,))
+                months.add(month)
+            with conn.cursor() as cur:
+                with cur.copy(f"copy posts ({', '.join(_POST_COLUMNS)}) from stdin") as copy:
+                    for m in messages:
+                        posted = datetime.fromisoformat(m["date"])
+                        refreshed = None
+                        if m["views"] is not None:
+                            refreshed = min(end, posted + timedelta(hours=rng.uniform(1, 72)))
+                        copy.write_row((
+                            channel_id, m["id"], posted, m["text"], json.dumps(m, ensure_ascii=False),
+                            m["views"], m["forwards"], m["replies"], m["reactions"], refreshed,
+                        ))
+            written += len(messages)
+    return written
+
+
+def _job_rows(rng: random.Random, channel_id: int, count: int, end: datetime, window: timedelta) -> list[tuple]:
+    rows = []
+    for i in range(count):
+        started = end - window + window * (i + rng.random()) / count
+        kind = "metrics" if rng.random() < 0.4 else "history"
+        status = "error" if rng.random() < 0.03 else "success"
+        stats = None
+        if status == "success":
+            key = "refreshed" if kind == "metrics" else "inserted"
+            stats = json.dumps({key: rng.randint(0, 200), "duration_s": round(rng.uniform(0.2, 20), 3)})
+        rows.append((
+            channel_id, kind, status, started, started + timedelta(seconds=rng.uniform(0.2, 20)),
+            stats, "FloodWaitError: A wait of 30 seconds is required" if status == "error" else None, started,
+        ))
+    return rows
+
+
+def seed(args: argparse.Namespace, dsn: str) -> dict:
+    rng = random.Random(args.seed)
+    end = datetime.now(timezone.utc)
+    window = timedelta(days=30.44 * args.months)
+    config = StreamConfig(text_median=args.text_median, no_text_share=args.no_text_share, seed=args.seed)
+    sizes = channel_sizes(rng, args.channels, args.posts, args.size_sigma)
+    # Bigger channels draw bigger audiences
+    views_medians = [max(10, int(config.views_median * (s / (args.posts / args.channels)) ** 0.5)) for s in sizes]
+
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        if not args.skip_schema:
+            conn.execute(SCHEMA.read_text(encoding="utf-8"))
+        if args.reset:
+            conn.execute(f"truncate {', '.join(_DATA_TABLES)} restart identity cascade")
+        elif conn.execute("select 1 from channels where tg_url like %s limit 1", (_URL_PREFIX + "%",)).fetchone():
+            sys.exit("Seeded channels already exist; pass --reset to start over")
+
+        started = time.perf_counter()
+        urls = [f"{_URL_PREFIX}{args.seed}_{i}" for i in range(args.channels)]
+        with conn.cursor() as cur:
+            with cur.copy(
+                "copy channels (tg_id, tg_url, title, status, created_at, fetch_interval_s, next_fetch_at, post_count) from stdin"
+            ) as copy:
+                for i, url in enumerate(urls):
+                    interval = rng.choice((300, 900, 3600, 21600))
+                    copy.write_row((
+                        2_000_000_000 + i, url, f"Seed channel {i}", "active",
+                        end - window + window * rng.random(), interval,
+                        end + timedelta(seconds=rng.uniform(0, interval)), sizes[i],
+                    ))
+            ids = dict(cur.execute("select tg_url, id from channels where tg_url = any(%s)", (urls,)).fetchall())
+        channels = [(i, ids[url], sizes[i], views_medians[i]) for i, url in enumerate(urls)]
+
+        # Largest channels first so workers finish together
+        channels.sort(key=lambda c: -c[2])
+        shards = [channels[w::args.workers] for w in range(args.workers)]
+        posts = 0
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = [
+                pool.submit(load_channels, dsn, asdict(config), shard, end.isoformat(), window.total_seconds() / 60)
+                for shard in shards if shard
+            ]
+            for future in as_completed(futures):
+                posts += future.result()
+                print(f"{posts} of {args.posts} posts loaded", file=sys.stderr)
+        posts_seconds = time.perf_counter() - started
+
+        with conn.cursor() as cur:
+            with cur.copy(
+                "copy fetch_jobs (channel_id, kind, status, started_at, finished_at, stats, error, created_at) from stdin"
+            ) as copy:
+                for _, channel_id, _, _ in channels:
+                    for row in _job_rows(rng, channel_id, args.jobs_per_channel, end, window):
+                        copy.write_row(row)
+        for table in ("channels", "posts", "fetch_jobs", "channel_stats_hourly", "channel_stats_daily", "post_metric_snapshots"):
+            conn.execute(f"vacuum (analyze) {table}")
+        elapsed = time.perf_counter() - started
+        # Partitioned tables are the sum of their partitions
+        sizes_mb = dict(conn.execute(
+            """
+            select t, round(sum(pg_total_relation_size(coalesce(p.relid, t::regclass))) / 1048576.0, 1)::float
+            from unnest(array['posts','post_metric_snapshots','channel_stats_hourly','fetch_jobs']) t
+            left join lateral pg_partition_tree(t::regclass) p on true
+            group by t
+            """
+        ).fetchall())
+
+    return {
+        "config": {**vars(args), "dsn": None},
+        "channels": args.channels,
+        "posts": posts,
+        "largest_channel": max(sizes),
+        "median_channel": sorted(sizes)[len(sizes) // 2],
+        "fetch_jobs": args.channels * args.jobs_per_channel,
+        "seconds": round(elapsed, 1),
+        "posts_per_second": round(posts / posts_seconds, 1) if posts_seconds else 0.0,
+        "table_mb": sizes_mb,
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    load_dotenv()
+    dsn = args.dsn or os.getenv("BENCH_DB_URL")
+    if not dsn:
+        sys.exit("Pass --dsn or set BENCH_DB_URL (a local database; the seeder writes to it)")
+    if args.channels < 1 or args.posts < args.channels:
+        sys.exit("Need at least one channel and one post per channel")
+    report = seed(args, dsn)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
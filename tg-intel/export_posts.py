@@ -0,0 +1,44 @@
+"""Export posts straight from the database: python export_posts.py --format parquet -o posts.parquet"""
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime
+
+from dotenv import load_dotenv
+import psycopg
+
+from apps.backend.services.export import EXPORT_FORMATS, parquet_available, stream_export
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Stream posts as NDJSON, CSV or Parquet with constant memory.")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="ndjson")
+    parser.add_argument("--channel-id", type=int, action="append", dest="channel_ids", help="repeat for several channels")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="posted_at >= (ISO 8601)")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="posted_at < (ISO 8601)")
+    parser.add_argument("--query", help="full-text filter (web search syntax)")
+    parser.add_argument("-o", "--output", help="file to write; stdout when omitted")
+    return parser.parse_args()
+
+
+async def main() -> None:
+    args = parse_args()
+    if args.format == "parquet" and not parquet_available():
+        sys.exit("Parquet export requires pyarrow")
+    load_dotenv()
+    dsn = os.getenv("SUPABASE_DB_URL")
+    if not dsn:
+        sys.exit("SUPABASE_DB_URL is not set")
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        async with await psycopg.AsyncConnection.connect(dsn, autocommit=True) as conn:
+            async for chunk in stream_export(conn, args.format, args.channel_ids, args.since, args.until, args.query):
+                out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
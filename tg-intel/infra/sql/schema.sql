@@ -12,23 +12,151 @@ create table if not exists channels (
   created_at timestamptz not null default now()
 );
 
--- Posts
+-- Resolved peer access_hash so fetches can build the input peer without resolving
+alter table channels add column if not exists tg_access_hash bigint;
+-- Access hashes are per account: the session (account name) that resolved tg_access_hash
+alter table channels add column if not exists tg_access_hash_account text;
+
+-- Adaptive fetch scheduling: learned polling interval and next due time
+alter table channels add column if not exists fetch_interval_s int;
+alter table channels add column if not exists next_fetch_at timestamptz;
+create index if not exists idx_channels_next_fetch_at on channels(next_fetch_at) where status='active';
+-- Lease held by a live-updates process; polling slows to a reconciling sweep while it is valid
+alter table channels add column if not exists live_until timestamptz;
+-- Newest tg_message_id up to which history is known to be contiguous, and when a history job last
+-- confirmed it. Only history jobs move it, so posts stored from live updates never hide a gap below them
+alter table channels add column if not exists history_watermark bigint;
+alter table channels add column if not exists history_synced_at timestamptz;
+
+-- Monthly range partitions (UTC) of a table partitioned by a timestamptz column, named <table>_yYYYYmMM
+create or replace function create_monthly_partition(parent regclass, month timestamptz) returns void
+language plpgsql as $$
+declare
+  base text := (select relname from pg_class where oid = parent);
+  m timestamp := date_trunc('month', month at time zone 'UTC');
+begin
+  -- Concurrent writers may ask for the same month
+  perform pg_advisory_xact_lock(hashtext(base || m::text));
+  execute format(
+    'create table if not exists %I partition of %s for values from (%L) to (%L)',
+    base || '_y' || to_char(m, 'YYYY') || 'm' || to_char(m, 'MM'),
+    parent,
+    to_char(m, 'YYYY-MM-DD') || ' 00:00:00+00',
+    to_char(m + interval '1 month', 'YYYY-MM-DD') || ' 00:00:00+00'
+  );
+end;
+$$;
+
+-- From last month to months_ahead
+create or replace function ensure_monthly_partitions(parent regclass, months_ahead int default 2) returns void
+language plpgsql as $$
+begin
+  for i in -1..months_ahead loop
+    perform create_monthly_partition(parent, now() + make_interval(months => i));
+  end loop;
+end;
+$$;
+
+-- Posts, range partitioned by posted_at into months: inserts only touch the current month's indexes,
+-- and old months can be archived and detached whole (see services/maintenance.py).
+-- Partitions are created ahead by the maintenance job and on demand by ingestion for older months.
+do $$
+declare
+  m timestamptz;
+begin
+  -- Older installs have a plain posts table: rebuild it as a partitioned one, keeping ids
+  if exists (select 1 from pg_class where oid = to_regclass('posts') and relkind = 'r') then
+    alter table posts rename to posts_unpartitioned;
+    alter table posts_unpartitioned rename constraint posts_pkey to posts_unpartitioned_pkey;
+    alter sequence posts_id_seq owned by none;
+    create table posts (like posts_unpartitioned including defaults) partition by range (posted_at);
+    alter table posts alter column posted_at set not null;
+    alter table posts add primary key (id, posted_at);
+    alter table posts add unique (channel_id, tg_message_id, posted_at);
+    alter table posts add constraint posts_channel_id_fkey foreign key (channel_id) references channels(id) on delete cascade;
+    if exists (select 1 from information_schema.columns where table_name = 'posts' and column_name = 'summary_id') then
+      alter table posts add constraint posts_summary_id_fkey foreign key (summary_id) references summaries(id) on delete set null;
+    end if;
+    -- The fetcher always stores the message date; undated rows, if any, are kept in the epoch month
+    update posts_unpartitioned set posted_at = 'epoch' where posted_at is null;
+    for m in select distinct date_trunc('month', posted_at at time zone 'UTC') at time zone 'UTC' from posts_unpartitioned loop
+      perform create_monthly_partition('posts', m);
+    end loop;
+    insert into posts select * from posts_unpartitioned;
+    alter sequence posts_id_seq owned by posts.id;
+    -- Also drops the old foreign keys from summaries and summary_jobs, which cannot reference a partitioned table
+    drop table posts_unpartitioned cascade;
+  end if;
+end;
+$$;
+
 create table if not exists posts (
-  id bigserial primary key,
+  id bigserial,
   channel_id bigint not null references channels(id) on delete cascade,
   tg_message_id bigint not null,
-  posted_at timestamptz,
+  posted_at timestamptz not null,
   text text,
   raw jsonb,
   text_tsv tsvector,
-  unique(channel_id, tg_message_id)
-);
+  primary key (id, posted_at),
+  unique(channel_id, tg_message_id, posted_at)
+) partition by range (posted_at);
+select ensure_monthly_partitions('posts');
+
+-- Keyset pagination by (posted_at, id); supersedes the plain posted_at index
+create index if not exists idx_posts_channel_posted_at_id on posts(channel_id, posted_at desc nulls last, id desc);
+drop index if exists idx_posts_channel_posted_at;
+
+-- Per-channel post total maintained by the ingest upsert, backfilled once for existing rows
+alter table channels add column if not exists post_count bigint not null default 0;
+update channels c set post_count = x.n
+from (select channel_id, count(*) as n from posts group by channel_id) x
+where x.channel_id = c.id and c.post_count = 0;
+update channels c set history_watermark = x.m
+from (select channel_id, max(tg_message_id) as m from posts group by channel_id) x
+where x.channel_id = c.id and c.history_watermark is null;
+
+-- Typed engagement counters, backfilled from raw for rows written by older versions
+alter table posts add column if not exists views int;
+alter table posts add column if not exists forwards int;
+alter table posts add column if not exists replies int;
+alter table posts add column if not exists reactions int;
+update posts set
+  views = nullif(raw->>'views','')::int,
+  forwards = nullif(raw->>'forwards','')::int,
+  replies = nullif(raw->>'replies','')::int,
+  reactions = nullif(raw->>'reactions','')::int
+where raw is not null
+  and ((views is null and nullif(raw->>'views','') is not null)
+    or (forwards is null and nullif(raw->>'forwards','') is not null)
+    or (replies is null and nullif(raw->>'replies','') is not null)
+    or (reactions is null and nullif(raw->>'reactions','') is not null));
+create index if not exists idx_posts_channel_views on posts(channel_id, views desc nulls last, id desc);
+create index if not exists idx_posts_channel_forwards on posts(channel_id, forwards desc nulls last, id desc);
+create index if not exists idx_posts_channel_replies on posts(channel_id, replies desc nulls last, id desc);
+create index if not exists idx_posts_channel_reactions on posts(channel_id, reactions desc nulls last, id desc);
+
+-- Engagement refresh: when a post's counters were last read, and how often to re-read them by age
+alter table posts add column if not exists metrics_refreshed_at timestamptz;
+create or replace function metrics_refresh_interval(age interval) returns interval
+language sql immutable as $$
+  select case
+    when age < interval '1 hour' then interval '5 minutes'
+    when age < interval '1 day' then interval '1 hour'
+    when age < interval '7 days' then interval '6 hours'
+    else interval '3 days'
+  end;
+$$;
 
-create index if not exists idx_posts_channel_posted_at on posts(channel_id, posted_at desc);
 create index if not exists idx_posts_tsv on posts using gin(text_tsv);
+-- Typo-tolerant fallback for /api/search (word_similarity via the <% operator)
+create index if not exists idx_posts_text_trgm on posts using gin(text gin_trgm_ops);
 
 create or replace function posts_tsvector_trigger() returns trigger language plpgsql as $$
 begin
+  if tg_op = 'UPDATE' and new.text is not distinct from old.text then
+    return new;
+  end if;
   new.text_tsv :=
     setweight(to_tsvector('simple', coalesce(new.text, '')), 'B');
   return new;
@@ -36,19 +164,235 @@ end;
 $$;
 
 drop trigger if exists posts_tsvector_update on posts;
-create trigger posts_tsvector_update before insert or update
+-- Only text changes need a new tsvector; metric-only updates skip the trigger
+create trigger posts_tsvector_update before insert or update of text
   on posts for each row execute function posts_tsvector_trigger();
 
+-- Per-channel activity rollups (UTC hour and day of posted_at): post counts and current engagement sums.
+-- Kept current by statement-level triggers on posts, so every ingest or metrics write folds in its own delta.
+-- The triggers upsert buckets in (channel_id, bucket) order, so concurrent history, metrics and live writes
+-- to a channel lock them in the same order and cannot deadlock.
+create table if not exists channel_stats_hourly (
+  channel_id bigint not null references channels(id) on delete cascade,
+  bucket timestamptz not null,
+  posts int not null default 0,
+  views bigint not null default 0,
+  forwards bigint not null default 0,
+  replies bigint not null default 0,
+  reactions bigint not null default 0,
+  primary key (channel_id, bucket)
+);
+create table if not exists channel_stats_daily (
+  channel_id bigint not null references channels(id) on delete cascade,
+  bucket timestamptz not null,
+  posts int not null default 0,
+  views bigint not null default 0,
+  forwards bigint not null default 0,
+  replies bigint not null default 0,
+  reactions bigint not null default 0,
+  primary key (channel_id, bucket)
+);
+
+create or replace function posts_rollup_insert() returns trigger language plpgsql as $$
+begin
+  with d as (
+    select channel_id, posted_at, 1 as posts, coalesce(views, 0)::bigint as views, coalesce(forwards, 0)::bigint as forwards,
+           coalesce(replies, 0)::bigint as replies, coalesce(reactions, 0)::bigint as reactions
+    from new_rows where posted_at is not null
+  ), h as (
+    insert into channel_stats_hourly as t (channel_id, bucket, posts, views, forwards, replies, reactions)
+    select channel_id, date_trunc('hour', posted_at, 'UTC'), sum(posts), sum(views), sum(forwards), sum(replies), sum(reactions)
+    from d group by 1, 2 order by 1, 2
+    on conflict (channel_id, bucket) do update set
+      posts = t.posts + excluded.posts, views = t.views + excluded.views, forwards = t.forwards + excluded.forwards,
+      replies = t.replies + excluded.replies, reactions = t.reactions + excluded.reactions
+  )
+  insert into channel_stats_daily as t (channel_id, bucket, posts, views, forwards, replies, reactions)
+  select channel_id, date_trunc('day', posted_at, 'UTC'), sum(posts), sum(views), sum(forwards), sum(replies), sum(reactions)
+  from d group by 1, 2 order by 1, 2
+  on conflict (channel_id, bucket) do update set
+    posts = t.posts + excluded.posts, views = t.views + excluded.views, forwards = t.forwards + excluded.forwards,
+    replies = t.replies + excluded.replies, reactions = t.reactions + excluded.reactions;
+  return null;
+end;
+$$;
+
+-- Updates move the old row out of its bucket and the new one in; rows whose counters did not change net to zero
+create or replace function posts_rollup_update() returns trigger language plpgsql as $$
+begin
+  with d as (
+    select channel_id, posted_at, sum(posts) as posts, sum(views) as views, sum(forwards) as forwards,
+           sum(replies) as replies, sum(reactions) as reactions
+    from (
+      select channel_id, posted_at, 1 as posts, coalesce(views, 0)::bigint as views, coalesce(forwards, 0)::bigint as forwards,
+             coalesce(replies, 0)::bigint as replies, coalesce(reactions, 0)::bigint as reactions
+      from new_rows
+      union all
+      select channel_id, posted_at, -1, -coalesce(views, 0)::bigint, -coalesce(forwards, 0)::bigint,
+             -coalesce(replies, 0)::bigint, -coalesce(reactions, 0)::bigint
+      from old_rows
+    ) x
+    where posted_at is not null
+    group by channel_id, posted_at
+    having sum(posts) <> 0 or sum(views) <> 0 or sum(forwards) <> 0 or sum(replies) <> 0 or sum(reactions) <> 0
+  ), h as (
+    insert into channel_stats_hourly as t (channel_id, bucket, posts, views, forwards, replies, reactions)
+    select channel_id, date_trunc('hour', posted_at, 'UTC'), sum(posts), sum(views), sum(forwards), sum(replies), sum(reactions)
+    from d group by 1, 2 order by 1, 2
+    on conflict (channel_id, bucket) do update set
+      posts = t.posts + excluded.posts, views = t.views + excluded.views, forwards = t.forwards + excluded.forwards,
+      replies = t.replies + excluded.replies, reactions = t.reactions + excluded.reactions
+  )
+  insert into channel_stats_daily as t (channel_id, bucket, posts, views, forwards, replies, reactions)
+  select channel_id, date_trunc('day', posted_at, 'UTC'), sum(posts), sum(views), sum(forwards), sum(replies), sum(reactions)
+  from d group by 1, 2 order by 1, 2
+  on conflict (channel_id, bucket) do update set
+    posts = t.posts + excluded.posts, views = t.views + excluded.views, forwards = t.forwards + excluded.forwards,
+    replies = t.replies + excluded.replies, reactions = t.reactions + excluded.reactions;
+  return null;
+end;
+$$;
+
+-- One-time backfill from existing posts, before the triggers start counting
+insert into channel_stats_hourly (channel_id, bucket, posts, views, forwards, replies, reactions)
+select channel_id, date_trunc('hour', posted_at, 'UTC'), count(*), coalesce(sum(views), 0), coalesce(sum(forwards), 0),
+       coalesce(sum(replies), 0), coalesce(sum(reactions), 0)
+from posts
+where posted_at is not null and not exists (select 1 from channel_stats_hourly)
+group by 1, 2;
+insert into channel_stats_daily (channel_id, bucket, posts, views, forwards, replies, reactions)
+select channel_id, date_trunc('day', bucket, 'UTC'), sum(posts), sum(views), sum(forwards), sum(replies), sum(reactions)
+from channel_stats_hourly
+where not exists (select 1 from channel_stats_daily)
+group by 1, 2;
+
+drop trigger if exists posts_rollup_ins on posts;
+create trigger posts_rollup_ins after insert on posts
+  referencing new table as new_rows
+  for each statement execute function posts_rollup_insert();
+drop trigger if exists posts_rollup_upd on posts;
+create trigger posts_rollup_upd after update on posts
+  referencing old table as old_rows new table as new_rows
+  for each statement execute function posts_rollup_update();
+
+-- Append-only engagement history: one narrow row per post whenever its counters change.
+-- Monthly partitions (created ahead by the maintenance job) let old months be dropped without touching posts.
+create table if not exists post_metric_snapshots (
+  post_id bigint not null,
+  captured_at timestamptz not null default now(),
+  views int,
+  forwards int,
+  replies int,
+  reactions int
+) partition by range (captured_at);
+create table if not exists post_metric_snapshots_default partition of post_metric_snapshots default;
+create index if not exists idx_post_metric_snapshots_post on post_metric_snapshots(post_id, captured_at);
+select ensure_monthly_partitions('post_metric_snapshots');
+
+create or replace function posts_snapshot_insert() returns trigger language plpgsql as $$
+begin
+  insert into post_metric_snapshots (post_id, views, forwards, replies, reactions)
+  select id, views, forwards, replies, reactions from new_rows
+  where coalesce(views, forwards, replies, reactions) is not null;
+  return null;
+end;
+$$;
+
+create or replace function posts_snapshot_update() returns trigger language plpgsql as $$
+begin
+  insert into post_metric_snapshots (post_id, views, forwards, replies, reactions)
+  select n.id, n.views, n.forwards, n.replies, n.reactions
+  from new_rows n join old_rows o on o.id = n.id
+  where (n.views, n.forwards, n.replies, n.reactions) is distinct from (o.views, o.forwards, o.replies, o.reactions);
+  return null;
+end;
+$$;
+
+drop trigger if exists posts_snapshot_ins on posts;
+create trigger posts_snapshot_ins after insert on posts
+  referencing new table as new_rows
+  for each statement execute function posts_snapshot_insert();
+drop trigger if exists posts_snapshot_upd on posts;
+create trigger posts_snapshot_upd after update on posts
+  referencing old table as old_rows new table as new_rows
+  for each statement execute function posts_snapshot_update();
+
+-- Months of posts archived to Parquet (POSTS_ARCHIVE_DIR) and detached from posts
+create table if not exists post_archives (
+  id bigserial primary key,
+  month timestamptz not null,
+  file_name text not null,
+  rows bigint not null,
+  bytes bigint not null,
+  channel_ids bigint[] not null default '{}',
+  archived_at timestamptz not null default now()
+);
+create index if not exists idx_post_archives_month on post_archives(month);
+
 -- Summaries
 create table if not exists summaries (
   id bigserial primary key,
-  post_id bigint not null unique references posts(id) on delete cascade,
+  post_id bigint,
   model_id text,
   summary text,
   tokens int,
   created_at timestamptz not null default now()
 );
 
+-- Summaries are shared by content: keyed by normalized text hash and model, posts link to theirs.
+-- Rows written by older versions have no hash and keep serving their own post_id.
+alter table summaries add column if not exists content_hash text;
+alter table summaries alter column post_id drop not null;
+alter table summaries drop constraint if exists summaries_post_id_key;
+create index if not exists idx_summaries_post on summaries(post_id);
+create unique index if not exists uq_summaries_hash_model on summaries(content_hash, model_id);
+-- post_id only records the post that produced a shared row. It is not a foreign key since posts is
+-- partitioned by posted_at; archiving a partition clears the ids of its posts.
+alter table summaries drop constraint if exists summaries_post_id_fkey;
+alter table posts add column if not exists summary_id bigint references summaries(id) on delete set null;
+update posts p set summary_id = s.id
+from summaries s
+where s.post_id = p.id and s.content_hash is null and p.summary_id is null;
+
+-- One provider call per (content hash, model) across replicas: the caller holding the lease summarizes,
+-- the others poll summaries. Leases are taken and released in short statements; expired ones are taken over.
+create table if not exists summary_leases (
+  content_hash text not null,
+  model_id text not null,
+  expires_at timestamptz not null,
+  primary key (content_hash, model_id)
+);
+
+-- Channel digests per window bucket; last_post_id is the watermark of posts already folded in
+create table if not exists channel_digests (
+  id bigserial primary key,
+  channel_id bigint not null references channels(id) on delete cascade,
+  window_start timestamptz not null,
+  model_id text not null default '',
+  digest text not null default '',
+  last_post_id bigint not null default 0,
+  post_count int not null default 0,
+  tokens int not null default 0,
+  updated_at timestamptz not null default now(),
+  unique(channel_id, window_start, model_id)
+);
+
+-- Background summarization queue: one row per long post, written at ingest and drained by summary workers
+-- post_id is not a foreign key (posts is partitioned); archiving deletes the jobs of archived posts
+create table if not exists summary_jobs (
+  id bigserial primary key,
+  post_id bigint not null unique,
+  status text not null default 'queued',
+  attempts int not null default 0,
+  not_before timestamptz,
+  started_at timestamptz,
+  finished_at timestamptz,
+  error text,
+  created_at timestamptz not null default now()
+);
+alter table summary_jobs drop constraint if exists summary_jobs_post_id_fkey;
+create index if not exists idx_summary_jobs_queued on summary_jobs(id) where status in ('queued','running');
+
 -- Fetch jobs
 create table if not exists fetch_jobs (
   id bigserial primary key,
@@ -59,7 +403,25 @@ create table if not exists fetch_jobs (
   stats jsonb,
   error text
 );
+-- Jobs deferred by a Telegram flood wait stay queued until not_before
+alter table fetch_jobs add column if not exists not_before timestamptz;
+-- 'history' fetches new posts, 'metrics' refreshes engagement counters of known posts
+alter table fetch_jobs add column if not exists kind text not null default 'history';
+-- Enqueue time, for the oldest-queued-job metric (flood-wait re-queues keep it)
+alter table fetch_jobs add column if not exists created_at timestamptz not null default now();
 create index if not exists idx_fetch_jobs_channel on fetch_jobs(channel_id);
 create index if not exists idx_fetch_jobs_started_at on fetch_jobs(started_at desc);
+create index if not exists idx_fetch_jobs_queued on fetch_jobs(id) where status='queued';
+
+-- At most one queued or running job per channel and kind (cancel duplicates left by older versions first)
+update fetch_jobs set status='cancelled', finished_at=now(), error='duplicate'
+where id in (
+  select id from (
+    select id, row_number() over (partition by channel_id, kind order by id) as rn
+    from fetch_jobs where status in ('queued','running')
+  ) d where d.rn > 1
+);
+drop index if exists uq_fetch_jobs_channel_active;
+create unique index if not exists uq_fetch_jobs_channel_kind_active on fetch_jobs(channel_id, kind) where status in ('queued','running');
 
 
@@ -1,5 +1,5 @@
 ﻿import importlib, sys
-mods=['apps.backend.app','apps.backend.api.channels','apps.backend.api.posts','apps.backend.api.summaries','apps.backend.services.telegram','apps.backend.services.fetcher','apps.backend.services.ai','apps.backend.core.db','apps.backend.core.config']
+mods=['apps.backend.app','apps.backend.api.channels','apps.backend.api.posts','apps.backend.api.search','apps.backend.api.export','apps.backend.api.analytics','apps.backend.services.export','apps.backend.api.summaries','apps.backend.services.telegram','apps.backend.services.fetcher','apps.backend.services.ratelimit','apps.backend.services.hashring','apps.backend.services.live','apps.backend.services.ai','apps.backend.services.summarizer','apps.backend.services.digest','apps.backend.services.maintenance','apps.backend.services.partitions','apps.backend.services.archive','apps.backend.api.archive','apps.backend.core.cache','apps.backend.core.metrics','apps.backend.core.db','apps.backend.core.config']
 ok=True
 for m in mods:
     try: